@@ -3,19 +3,261 @@ import torch.optim as optim
 import torch.nn.functional as F
 import numpy as np
 import os
+import pickle
 import logging
-from collections import defaultdict
+import threading
+from collections import deque
+from collections.abc import Mapping
 
 try:
     from .network import TradingNetwork
 except ImportError:
     from network import TradingNetwork
 
+# Numba is optional; without it the conversion table uses plain NumPy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 
 logger = logging.getLogger(__name__)
 
 
+def _best_conversion_rates_numpy(single_hop, max_hops):
+    """
+    Max-product closure of a single-hop rate matrix, one hop at a time.
+
+    Args:
+        single_hop: Best rate offered for each i -> j trade (zero diagonal)
+        max_hops: Maximum number of trading hops to consider
+
+    Returns:
+        Array where entry [i, j] is the best hop-discounted rate from i to j
+    """
+    num_items = single_hop.shape[0]
+    best_rates = np.zeros((num_items, num_items))
+    hop_rates = np.eye(num_items)
+    # Scratch buffers reused across hops: path products and discounted rates
+    path_rates = np.empty((num_items, num_items, num_items))
+    discounted = np.empty((num_items, num_items))
+    for hop in range(1, max_hops + 1):
+        # Best rate reachable in exactly `hop` trades
+        np.multiply(hop_rates[:, :, None], single_hop[None, :, :], out=path_rates)
+        path_rates.max(axis=1, out=hop_rates)
+        # Apply diminishing returns for longer paths
+        np.multiply(hop_rates, 0.9 ** (hop - 1), out=discounted)
+        np.maximum(best_rates, discounted, out=best_rates)
+    return best_rates
+
+
+def _best_conversion_rates_loops(single_hop, max_hops):
+    """Loop form of _best_conversion_rates_numpy, for compiling with Numba."""
+    num_items = single_hop.shape[0]
+    best_rates = np.zeros((num_items, num_items))
+    hop_rates = np.eye(num_items)
+    next_rates = np.zeros((num_items, num_items))
+    hop_penalty = 1.0
+    for hop in range(max_hops):
+        for i in range(num_items):
+            for j in range(num_items):
+                rate = 0.0
+                for k in range(num_items):
+                    candidate = hop_rates[i, k] * single_hop[k, j]
+                    if candidate > rate:
+                        rate = candidate
+                next_rates[i, j] = rate
+                if rate * hop_penalty > best_rates[i, j]:
+                    best_rates[i, j] = rate * hop_penalty
+        hop_rates, next_rates = next_rates, hop_rates
+        hop_penalty *= 0.9
+    return best_rates
+
+
+if njit is not None:
+    _best_conversion_rates = njit(cache=True)(_best_conversion_rates_loops)
+else:
+    _best_conversion_rates = _best_conversion_rates_numpy
+
+
+class _MarketSnapshot:
+    """
+    Arrays derived once from a market_data snapshot and shared by every agent.
+
+    All agents read the same public matrices within a step, so stacking them
+    and reducing over agents happens once per snapshot instead of once per
+    agent. Per-agent "everyone but me" reductions are recovered from the
+    best and second-best rate offered for each trade.
+    """
+
+    def __init__(self, market_data):
+        self.market_data = market_data
+        self.ids = list(market_data)
+        self.row = {agent_id: i for i, agent_id in enumerate(self.ids)}
+        # stack[a]: trading matrix of the a-th agent in market order
+        self.stack = _stack_rows(list(market_data.values()))
+        self.total = self.stack.sum(axis=0)
+
+        num_agents = len(self.stack)
+        if num_agents > 1:
+            ranked = np.partition(self.stack, num_agents - 2, axis=0)
+            self.best_rates = ranked[-1]
+            self.second_best_rates = ranked[-2]
+        else:
+            self.best_rates = self.stack[0]
+            self.second_best_rates = np.zeros_like(self.stack[0])
+        self.best_agent = self.stack.argmax(axis=0)
+
+        # wants[a, j]: agent a offers a positive rate for some trade into item j
+        self.wants = (self.stack > 0).any(axis=1)
+        self.demand = self.wants.sum(axis=0)
+
+        self._positions_source = None
+        self._positions = None
+
+    def num_others(self, agent_id):
+        """Number of agents in the snapshot other than agent_id."""
+        return len(self.stack) - (agent_id in self.row)
+
+    def others_best_rates(self, agent_id):
+        """Best rate offered for each trade by agents other than agent_id."""
+        row = self.row.get(agent_id)
+        if row is None:
+            return self.best_rates
+        return np.where(
+            self.best_agent == row, self.second_best_rates, self.best_rates
+        )
+
+    def others_demand(self, agent_id):
+        """Number of agents other than agent_id willing to trade for each item."""
+        row = self.row.get(agent_id)
+        if row is None:
+            return self.demand
+        return self.demand - self.wants[row]
+
+    def positions(self, agent_positions):
+        """
+        Positions of the snapshot's agents, in market order.
+
+        Args:
+            agent_positions: Dictionary of agent_id -> position
+
+        Returns:
+            Tuple (positions, known) of an (agents, 2) array and a mask of the
+            agents present in agent_positions; unknown agents' rows are zero
+        """
+        if self._positions_source is not agent_positions:
+            known = np.fromiter(
+                (agent_id in agent_positions for agent_id in self.ids),
+                dtype=bool,
+                count=len(self.ids),
+            )
+            if known.all():
+                positions = _stack_rows(
+                    [agent_positions[agent_id] for agent_id in self.ids]
+                )
+            else:
+                positions = np.zeros((len(self.ids), 2))
+                for row in np.flatnonzero(known):
+                    positions[row] = agent_positions[self.ids[row]]
+            self._positions_source = agent_positions
+            self._positions = (positions, known)
+        return self._positions
+
+
+def _stack_rows(matrices):
+    """
+    Stack matrices, reusing their base array when they are already its rows.
+
+    TradingEnvironment publishes market_data as row views of one stacked
+    array, so the snapshot can share that array instead of copying it again.
+    """
+    base = matrices[0].base
+    if (
+        isinstance(base, np.ndarray)
+        and base.shape == (len(matrices),) + matrices[0].shape
+        and all(
+            matrix.base is base
+            and matrix.__array_interface__["data"][0]
+            == base.__array_interface__["data"][0] + i * base.strides[0]
+            for i, matrix in enumerate(matrices)
+        )
+    ):
+        return base
+    return np.stack(matrices)
+
+
+# One cached snapshot per thread: environments stepped on separate threads
+# (training and external simulation) must not evict or read each other's
+_snapshot_cache = threading.local()
+
+
+def _get_market_snapshot(market_data):
+    """Return the cached _MarketSnapshot for market_data, rebuilding it on change."""
+    snapshot = getattr(_snapshot_cache, "snapshot", None)
+    if snapshot is None or snapshot.market_data is not market_data:
+        snapshot = _MarketSnapshot(market_data)
+        _snapshot_cache.snapshot = snapshot
+    return snapshot
+
+
+class _InventoryView(Mapping):
+    """Dict-style, write-through view over an agent's inventory array."""
+
+    def __init__(self, agent):
+        self._agent = agent
+
+    def __getitem__(self, item):
+        amount = self._agent.inventory_arr[self._agent.item_to_idx[item]].item()
+        # Whole amounts read back as int, as the dict-based inventory held them
+        return int(amount) if amount.is_integer() else amount
+
+    def __setitem__(self, item, amount):
+        self._agent.inventory_arr[self._agent.item_to_idx[item]] = amount
+
+    def __iter__(self):
+        return iter(self._agent.items_list)
+
+    def __len__(self):
+        return self._agent.num_items
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self):
+        return dict(self)
+
+
+def _policy_train_step(network, optimizer, state, target):
+    """
+    Run one MSE regression step of the policy network towards a target matrix.
+
+    Args:
+        network: Policy network to update
+        optimizer: Optimizer over the network's parameters
+        state: State vector tensor (unbatched)
+        target: Flattened target trading matrix tensor
+
+    Returns:
+        Loss tensor of the step
+    """
+    network.train()
+    predicted = network(state.unsqueeze(0))
+    loss = F.mse_loss(predicted, target.unsqueeze(0))
+
+    # set_to_none skips writing zeros into every gradient buffer
+    optimizer.zero_grad(set_to_none=True)
+    loss.backward()
+    optimizer.step()
+    network.weights_version += 1
+    network.eval()
+    return loss
+
+
 class TradingAgent:
+    # Number of recent trades kept for cycle detection
+    TRADE_RING_SIZE = 8
+
     def __init__(
         self, agent_id, config, items_list, desired_item, initial_inventory=None
     ):
@@ -31,106 +273,221 @@ class TradingAgent:
         """
         self.agent_id = agent_id
         self.config = config
+        self._rng = np.random.default_rng()
         self.items_list = items_list
         self.desired_item = desired_item
         self.num_items = len(items_list)
+        self.item_to_idx = {item: i for i, item in enumerate(items_list)}
+        if desired_item not in self.item_to_idx:
+            raise ValueError(f"Desired item {desired_item!r} is not in items_list")
+        self.desired_item_idx = self.item_to_idx[desired_item]
 
-        # Initialize inventory
+        # One-hot encoding of the desired item, reused by every state vector
+        self.desired_one_hot = np.zeros(self.num_items, dtype=np.float32)
+        self.desired_one_hot[self.desired_item_idx] = 1.0
+
+        # Initialize inventory (one slot per item, indexed via item_to_idx)
+        self.inventory_arr = np.empty(self.num_items, dtype=np.float64)
         if initial_inventory is None:
             # Random initial inventory
-            self.inventory = {item: np.random.randint(5, 15) for item in items_list}
+            self.inventory_arr[:] = self._rng.integers(5, 15, self.num_items)
         else:
-            self.inventory = initial_inventory.copy()
+            self.inventory = initial_inventory
 
-        # Initialize trading matrix (how much of item j to accept for 1 of item i)
-        self.trading_matrix = np.random.uniform(
+        # Initialize trading matrix (how much of item j to accept for 1 of item i),
+        # stored as float32 to match the network's input and output
+        self.trading_matrix = self._rng.uniform(
             0.5, 2.0, (self.num_items, self.num_items)
-        )
+        ).astype(np.float32)
         # Diagonal should be 1 (trading item for itself at 1:1 rate)
         np.fill_diagonal(self.trading_matrix, 1.0)
 
+        # Preallocated network input: inventory, desired one-hot, own matrix,
+        # market average and success rate, filled in place by get_state_vector
+        num_pairs = self.num_items * self.num_items
+        self._state_np = np.zeros(2 * self.num_items + 2 * num_pairs + 1, dtype=np.float32)
+        self._state_tensor = torch.from_numpy(self._state_np)
+        matrix_start = 2 * self.num_items
+        self._state_slots = (
+            slice(0, self.num_items),
+            slice(self.num_items, matrix_start),
+            slice(matrix_start, matrix_start + num_pairs),
+            slice(matrix_start + num_pairs, matrix_start + 2 * num_pairs),
+        )
+
         # Neural network for updating trading matrix
         self.network = TradingNetwork(config, self.num_items)
-        self.optimizer = optim.Adam(
-            self.network.parameters(), lr=config["learning"]["learning_rate"]
+        learning_rate = config["learning"]["learning_rate"]
+        # Fused Adam updates all parameters in one kernel; fall back to the
+        # default implementation where PyTorch or the device lacks it. Fused
+        # steps do not bump param._version, so every step also increments
+        # network.weights_version for StackedNetworks
+        try:
+            self.optimizer = optim.Adam(
+                self.network.parameters(), lr=learning_rate, fused=True
+            )
+        except (TypeError, RuntimeError):
+            self.optimizer = optim.Adam(self.network.parameters(), lr=learning_rate)
+        # Inference mode by default; update_policy switches to train() briefly
+        self.network.eval()
+
+        # Experience tracking: the most recent trades as a ring buffer of
+        # (partner, item given, item received) indices
+        self._trade_ring = np.full((self.TRADE_RING_SIZE, 3), -1, dtype=np.int32)
+        self._trade_count = 0
+        self._partner_idx = {}  # partner agent_id -> index used in the ring
+        # Only the latest rewards are kept; _reward_count drives the update schedule
+        self.reward_history = deque(
+            maxlen=config["learning"].get("reward_history_len", 1024)
         )
-
-        # Experience tracking
-        self.trade_history = []
-        self.reward_history = []
-        self.position = np.random.uniform(
+        self._reward_count = 0
+        self.position = self._rng.uniform(
             0, config["environment"]["world_size"], 2
         )  # x, y coordinates
 
         # Performance metrics
-        self.generation_start_inventory = self.inventory.copy()
+        self.generation_start_inventory_arr = self.inventory_arr.copy()
         self.successful_trades = 0
         self.attempted_trades = 0
 
-    def get_state_vector(self, market_data=None):
-        """Create state vector for neural network input."""
-        state_components = []
+        # Multi-hop conversion rates and per-item strategic values,
+        # cached per market_data snapshot
+        self._conversion_cache = (None, None, None)
+        self._strategic_cache = (None, None)
+
+        # Last checkpoint directory known to exist, to skip repeated makedirs
+        self._save_dir = None
+
+    def __getstate__(self):
+        # The state tensor aliases _state_np; copying both separately would
+        # leave get_state_vector returning a stale tensor, so it is rebuilt
+        state = self.__dict__.copy()
+        del state["_state_tensor"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._state_tensor = torch.from_numpy(self._state_np)
+
+    @property
+    def inventory(self):
+        """Inventory as an item-name mapping backed by ``inventory_arr``."""
+        return _InventoryView(self)
+
+    @inventory.setter
+    def inventory(self, inventory):
+        unknown = [item for item in inventory if item not in self.item_to_idx]
+        if unknown:
+            raise ValueError(f"Inventory items {unknown!r} are not in items_list")
+        self.inventory_arr[:] = 0.0
+        for item, amount in inventory.items():
+            self.inventory_arr[self.item_to_idx[item]] = amount
+
+    def get_state_vector(self, market_data=None, market_sum=None):
+        """
+        Create state vector for neural network input.
+
+        The returned tensor shares memory with a buffer that is refilled on
+        every call; clone it to keep a state across calls.
+
+        Args:
+            market_data: Dictionary of other agents' trading matrices
+            market_sum: Optional element-wise sum of all matrices in market_data,
+                computed once by the caller and shared between agents
+        """
+        state = self._state_np
+        inventory_slot, one_hot_slot, matrix_slot, market_slot = self._state_slots
 
         # Current inventory (normalized)
-        inventory_vector = [self.inventory[item] for item in self.items_list]
-        max_inventory = max(inventory_vector) if max(inventory_vector) > 0 else 1
-        normalized_inventory = [x / max_inventory for x in inventory_vector]
-        state_components.extend(normalized_inventory)
+        max_inventory = self.inventory_arr.max()
+        if max_inventory <= 0:
+            max_inventory = 1.0
+        np.divide(
+            self.inventory_arr, max_inventory, out=state[inventory_slot], casting="unsafe"
+        )
 
         # Desired item index (one-hot encoding)
-        desired_item_vector = [0.0] * self.num_items
-        if self.desired_item in self.items_list:
-            desired_item_vector[self.items_list.index(self.desired_item)] = 1.0
-        state_components.extend(desired_item_vector)
+        state[one_hot_slot] = self.desired_one_hot
 
         # Current trading matrix (flattened)
-        state_components.extend(self.trading_matrix.flatten())
+        state[matrix_slot] = self.trading_matrix.ravel()
 
         # Market information (if available)
-        if market_data:
-            # Average market rates for each item pair
-            market_rates = np.zeros((self.num_items, self.num_items))
-            for other_agent_id, other_matrix in market_data.items():
-                if other_agent_id != self.agent_id:
-                    market_rates += other_matrix
-
-            if len(market_data) > 1:
-                market_rates /= len(market_data) - 1  # Exclude self
-
-            state_components.extend(market_rates.flatten())
+        num_others = (
+            len(market_data) - (self.agent_id in market_data) if market_data else 0
+        )
+        if num_others > 0:
+            if market_sum is None:
+                market_sum = _get_market_snapshot(market_data).total
+            # Average market rates for each item pair (excluding self),
+            # computed directly in the state buffer
+            market_rates = state[market_slot]
+            market_rates[:] = market_sum.ravel()
+            if self.agent_id in market_data:
+                market_rates -= market_data[self.agent_id].ravel()
+            market_rates /= max(len(market_data) - 1, 1)
         else:
             # If no market data, pad with zeros
-            state_components.extend([0.0] * (self.num_items * self.num_items))
+            state[market_slot] = 0.0
 
         # Recent performance metrics
-        recent_success_rate = self.successful_trades / max(self.attempted_trades, 1)
-        state_components.append(recent_success_rate)
+        state[-1] = self.successful_trades / max(self.attempted_trades, 1)
 
-        return torch.FloatTensor(state_components)
+        return self._state_tensor
 
-    def update_trading_matrix(self, market_data=None):
+    def update_trading_matrix(self, market_data=None, market_sum=None):
         """Update trading matrix using neural network."""
-        state = self.get_state_vector(market_data)
+        state = self.get_state_vector(market_data, market_sum)
 
         # Get new trading matrix from network
-        with torch.no_grad():
+        with torch.inference_mode():
             matrix_update = self.network(state.unsqueeze(0))
             matrix_update = matrix_update.squeeze(0).numpy()
 
+        self._apply_matrix_update(matrix_update)
+
+    @classmethod
+    def update_trading_matrices(
+        cls, agents, market_data=None, market_sum=None, stacked_networks=None
+    ):
+        """
+        Update several agents' trading matrices with one batched network forward.
+
+        Falls back to per-agent update_trading_matrix calls when the agents'
+        networks cannot be batched.
+
+        Args:
+            agents: Agents to update
+            market_data: Dictionary of other agents' trading matrices
+            market_sum: Optional element-wise sum of all matrices in market_data
+            stacked_networks: StackedNetworks cache reused across calls
+        """
+        networks = [agent.network for agent in agents]
+        if stacked_networks is None or not stacked_networks.supports(networks):
+            for agent in agents:
+                agent.update_trading_matrix(market_data, market_sum)
+            return
+
+        states = torch.stack(
+            [agent.get_state_vector(market_data, market_sum) for agent in agents]
+        )
+        matrix_updates = stacked_networks(networks, states).numpy()
+
+        for agent, matrix_update in zip(agents, matrix_updates):
+            agent._apply_matrix_update(matrix_update)
+
+    def _apply_matrix_update(self, matrix_update):
+        """Blend a flattened network output into the trading matrix."""
         # Reshape to matrix form
         matrix_update = matrix_update.reshape(self.num_items, self.num_items)
 
         # Apply update with learning rate
         learning_rate = self.config["learning"]["matrix_update_rate"]
-        self.trading_matrix = (
-            1 - learning_rate
-        ) * self.trading_matrix + learning_rate * matrix_update
+        self.trading_matrix *= 1 - learning_rate
+        self.trading_matrix += learning_rate * matrix_update
 
-        # Ensure diagonal is 1
-        np.fill_diagonal(self.trading_matrix, 1.0)
-        self.trading_matrix = np.maximum(self.trading_matrix, 0.1)  # Minimum rate
-        self.trading_matrix = np.minimum(self.trading_matrix, 10.0)  # Maximum rate
-        # Re-ensure diagonal stays 1 after min/max operations
+        # Keep rates within [0.1, 10.0] and the diagonal at 1
+        np.clip(self.trading_matrix, 0.1, 10.0, out=self.trading_matrix)
         np.fill_diagonal(self.trading_matrix, 1.0)
 
     def select_trade_action(self, market_data, other_agents_positions):
@@ -144,105 +501,93 @@ class TradingAgent:
         if not market_data or len(market_data) <= 1:
             return None
 
-        best_trade = None
-        best_value = -float("inf")
-
-        # Get recent trade partners to avoid immediate cycles
-        recent_partners = self._get_recent_trade_partners()
+        max_trade_distance = self.config["environment"]["max_trade_distance"]
+        max_trade_amount = self.config["environment"]["max_trade_amount"]
+
+        # Distance to every other agent we know the position of, in market
+        # order; skip those that are too far away, comparing squared
+        # distances so rejected agents need no sqrt
+        snapshot = _get_market_snapshot(market_data)
+        positions, known = snapshot.positions(other_agents_positions)
+        offsets = positions - self.position
+        squared_distances = np.einsum("ij,ij->i", offsets, offsets)
+        in_range = known & (
+            squared_distances <= max_trade_distance * max_trade_distance
+        )
+        own_row = snapshot.row.get(self.agent_id)
+        if own_row is not None:
+            in_range[own_row] = False
+        candidate_rows = np.flatnonzero(in_range)
+        if candidate_rows.size == 0:
+            return None
+        candidate_ids = [snapshot.ids[row] for row in candidate_rows]
+        distances = np.sqrt(squared_distances[candidate_rows])
+
+        # Recent trades with each candidate, to avoid immediate cycles:
+        # recent_matches[c, t] is True if recent trade t was with candidate c
+        recent_trades = self._recent_trades()
+        candidate_partners = np.array(
+            [self._partner_idx.get(agent_id, -1) for agent_id in candidate_ids]
+        )
+        recent_matches = candidate_partners[:, None] == recent_trades[None, :, 0]
+
+        # Penalty for recent trading with each candidate: none for new partners,
+        # growing with how often we traded with them recently
+        recent_counts = recent_matches.sum(axis=1)
+        cycle_penalties = np.select(
+            [recent_counts >= 3, recent_counts >= 2, recent_counts >= 1],
+            [0.1, 0.3, 0.7],
+            default=1.0,
+        )
 
-        # Evaluate potential trades with each other agent
-        for other_agent_id, other_matrix in market_data.items():
-            if other_agent_id == self.agent_id:
-                continue
+        # their_rates[a, want, give]: how much of `want` agent a gives per `give`
+        their_rates = snapshot.stack[candidate_rows].transpose(0, 2, 1)
 
-            # Calculate distance to other agent
-            if other_agent_id in other_agents_positions:
-                other_pos = other_agents_positions[other_agent_id]
-                distance = np.linalg.norm(np.array(self.position) - np.array(other_pos))
-            else:
-                distance = float("inf")
+        # Strategic value of each item as a stepping stone to our desired item
+        strategic_values = self._get_strategic_values(market_data)
+        is_desired = np.arange(self.num_items) == self.desired_item_idx
+        wanted = is_desired | (strategic_values > 0)
+        # High bonus for desired item, strategic value as multiplier otherwise
+        item_bonus = np.where(is_desired, 2.0, 1.0 + strategic_values)
 
-            # Skip if too far away
-            if distance > self.config["environment"]["max_trade_distance"]:
-                continue
+        # Amount we can get based on what we have
+        max_amounts = np.minimum(
+            max_trade_amount, self.inventory_arr[None, None, :] * their_rates
+        )
 
-            # Calculate penalty for recent trading with this agent
-            cycle_penalty = self._calculate_cycle_penalty(
-                other_agent_id, recent_partners
-            )
+        # Set minimum trade threshold to avoid micro-trades
+        min_trade_threshold = 0.01
+        valid = (
+            wanted[None, :, None]
+            & (self.inventory_arr > 0)[None, None, :]  # Can't trade what we don't have
+            & (their_rates > 0)  # They don't want this trade
+            & (max_amounts > min_trade_threshold)
+            & ~self._cycle_mask(recent_matches, recent_trades)
+        )
+        if not valid.any():
+            return None
 
-            # Evaluate each possible item to trade for (D_j - what we want)
-            for want_item_idx, want_item in enumerate(self.items_list):
-                if want_item != self.desired_item:
-                    # Check if this item has strategic value for reaching our desired item
-                    strategic_value = self._calculate_strategic_value_for_item(
-                        want_item, market_data
-                    )
-                    if strategic_value <= 0:
-                        continue  # No strategic value, skip this item
-
-                # Find what we can offer that they want (D_i - what we give)
-                for give_item_idx, give_item in enumerate(self.items_list):
-                    if self.inventory[give_item] <= 0:
-                        continue  # Can't trade what we don't have
-
-                    # Check if this trade would create an immediate cycle
-                    if self._would_create_cycle(
-                        other_agent_id, give_item, want_item, recent_partners
-                    ):
-                        continue  # Skip trades that would create cycles
-
-                    # How much they want for our item (their trading matrix)
-                    their_rate = other_matrix[give_item_idx, want_item_idx]
-                    if their_rate <= 0:
-                        continue  # They don't want this trade
-
-                    # Calculate how much we want to get
-                    max_trade_amount = min(
-                        self.config["environment"]["max_trade_amount"],
-                        self.inventory[give_item]
-                        * their_rate,  # Max we can get based on what we have
-                    )
+        # Trade value: their rate, discounted by distance and recent trading,
+        # scaled by how useful the item we receive is
+        distance_penalty = 1.0 / (1.0 + distances)
+        trade_values = their_rates * distance_penalty[:, None, None]
+        trade_values *= cycle_penalties[:, None, None]
+        trade_values *= item_bonus[None, :, None]
+        trade_values[~valid] = -np.inf
+
+        # First best trade in (agent, want, give) order
+        agent_pos, want_idx, give_idx = np.unravel_index(
+            trade_values.argmax(), trade_values.shape
+        )
 
-                    # Set minimum trade threshold to avoid micro-trades
-                    min_trade_threshold = 0.01
-                    if max_trade_amount <= min_trade_threshold:
-                        continue
-
-                    # Calculate trade value
-                    distance_penalty = 1.0 / (1.0 + distance)
-                    trade_value = their_rate * distance_penalty
-
-                    # Apply cycle penalty to discourage repeated trading with same partner
-                    trade_value *= cycle_penalty
-
-                    # Apply bonuses based on item type
-                    if want_item == self.desired_item:
-                        trade_value *= 2.0  # High bonus for desired item
-                    else:
-                        # For intermediate items, use strategic value as multiplier
-                        strategic_bonus = self._calculate_strategic_value_for_item(
-                            want_item, market_data
-                        )
-                        trade_value *= (
-                            1.0 + strategic_bonus
-                        )  # Bonus based on strategic value
-
-                    if trade_value > best_value:
-                        best_value = trade_value
-                        # Amount we want to receive (D_j_amt)
-                        desired_amount = min(
-                            max_trade_amount,
-                            self.config["environment"]["max_trade_amount"],
-                        )
-                        best_trade = (
-                            other_agent_id,
-                            give_item,
-                            want_item,
-                            desired_amount,
-                        )
-
-        return best_trade
+        # Amount we want to receive (D_j_amt)
+        desired_amount = float(max_amounts[agent_pos, want_idx, give_idx])
+        return (
+            candidate_ids[agent_pos],
+            self.items_list[give_idx],
+            self.items_list[want_idx],
+            desired_amount,
+        )
 
     def calculate_reward(self, market_data=None):
         """
@@ -254,17 +599,19 @@ class TradingAgent:
         Returns:
             Total reward considering direct value and indirect trading opportunities
         """
+        desired_amount = float(self.inventory_arr[self.desired_item_idx])
+
         # Primary reward: quantity of desired item
-        primary_reward = self.inventory[self.desired_item]
+        primary_reward = desired_amount
 
         # Bonus for improvement over generation start
         improvement_bonus = (
-            self.inventory[self.desired_item]
-            - self.generation_start_inventory[self.desired_item]
+            desired_amount
+            - self.generation_start_inventory_arr[self.desired_item_idx]
         )
 
         # Penalty for having zero of desired item
-        zero_penalty = -10.0 if self.inventory[self.desired_item] == 0 else 0.0
+        zero_penalty = -10.0 if desired_amount == 0 else 0.0
 
         # Small bonus for successful trades (encourages activity)
         trade_bonus = self.successful_trades * 0.1
@@ -274,17 +621,12 @@ class TradingAgent:
             self._calculate_strategic_value(market_data) if market_data else 0.0
         )
 
-        # Diversity bonus: small reward for having diverse inventory
-        # diversity_bonus = self._calculate_diversity_bonus()
-        diversity_bonus = 0.0
-
         total_reward = (
             primary_reward
             + improvement_bonus
             + zero_penalty
             + trade_bonus
             + strategic_value
-            + diversity_bonus
         )
         return total_reward
 
@@ -304,220 +646,183 @@ class TradingAgent:
         if not market_data or len(market_data) <= 1:
             return 0.0
 
-        desired_item_idx = self.items_list.index(self.desired_item)
-        strategic_value = 0.0
-
-        # For each item in our inventory, calculate its strategic value
-        for item_idx, item in enumerate(self.items_list):
-            if item == self.desired_item:
-                continue  # Already counted in primary reward
-
-            item_quantity = self.inventory[item]
-            if item_quantity <= 0:
-                continue
-
-            # Calculate the best conversion rate from this item to desired item
-            # considering both direct and indirect paths
-            best_conversion_rate = self._find_best_conversion_path(
-                item_idx, desired_item_idx, market_data, max_hops=3
-            )
-
-            # Strategic value = quantity * best_conversion_rate * discount_factor
-            # Discount factor reduces value of indirect paths
-            discount_factor = 0.3  # Weight for strategic vs direct value
-            item_strategic_value = (
-                item_quantity * best_conversion_rate * discount_factor
-            )
-            strategic_value += item_strategic_value
+        # Best conversion rate from every item to the desired item,
+        # considering both direct and indirect paths
+        best_conversion_rates = self._precompute_conversion_table(
+            market_data, max_hops=3
+        )[:, self.desired_item_idx]
+
+        # Only items we hold count; the desired item is already in primary reward
+        item_quantities = np.maximum(self.inventory_arr, 0.0)
+        item_quantities[self.desired_item_idx] = 0.0
+
+        # Strategic value = quantity * best_conversion_rate * discount_factor
+        # Discount factor reduces value of indirect paths
+        discount_factor = 0.3  # Weight for strategic vs direct value
+        strategic_value = float(
+            np.dot(item_quantities, best_conversion_rates) * discount_factor
+        )
 
         return strategic_value
 
-    def _calculate_diversity_bonus(self):
-        """
-        Calculate a small bonus for maintaining diverse inventory.
-
-        This encourages agents to keep some of all items rather than
-        specializing too heavily, which helps maintain trading opportunities.
-
-        Returns:
-            Small diversity bonus (typically 0-2 points)
+    def _get_strategic_values(self, market_data):
         """
-        # Count how many different items we have (non-zero quantities)
-        items_held = sum(1 for amount in self.inventory.values() if amount > 0)
-
-        # Bonus scales with number of different items held
-        max_diversity = len(self.items_list)
-        diversity_ratio = items_held / max_diversity
-
-        # Small bonus (max 1.0 points) for diversity
-        diversity_bonus = diversity_ratio * 1.0
-
-        return diversity_bonus
-
-    def _calculate_strategic_value_for_item(self, item_name, market_data=None):
-        """
-        Calculate strategic value for acquiring a specific item.
-
-        This evaluates how valuable it would be to acquire this item based on
-        potential trading paths to our desired item.
+        Strategic value of every item, computed once per market_data snapshot.
 
         Args:
-            item_name: Name of the item to evaluate
             market_data: Dictionary of other agents' trading matrices
 
         Returns:
-            Strategic value score (0.0 if no value, higher = more valuable)
+            Array of strategic values (0.0 if no value, higher = more valuable),
+            in items_list order
         """
         if not market_data or len(market_data) <= 1:
-            return 0.0
-
-        # If this IS our desired item, it has maximum direct value
-        if item_name == self.desired_item:
-            return 1.0
+            return np.zeros(self.num_items)
 
-        # Find item indices
-        try:
-            item_idx = self.items_list.index(item_name)
-            desired_item_idx = self.items_list.index(self.desired_item)
-        except ValueError:
-            return 0.0  # Item not in our items list
-
-        # Calculate best conversion rate from this item to our desired item
-        best_conversion_rate = self._find_best_conversion_path(
-            item_idx, desired_item_idx, market_data, max_hops=3
-        )
+        cached_market, cached_values = self._strategic_cache
+        if cached_market is market_data:
+            return cached_values
 
-        if best_conversion_rate <= 0:
-            return 0.0
+        # Best conversion rate from each item to our desired item
+        best_conversion_rates = self._precompute_conversion_table(
+            market_data, max_hops=3
+        )[:, self.desired_item_idx]
 
         # Strategic value factors:
         # 1. Conversion rate (how much desired item we can get)
         # 2. Market availability (how many agents want this item)
         # 3. Distance penalty for indirect paths
 
-        # Market availability: count how many agents are willing to trade for this item
-        market_demand = 0
-        total_agents = 0
-
-        for agent_id, other_matrix in market_data.items():
-            if agent_id == self.agent_id:
-                continue
-            total_agents += 1
-
-            # Check if this agent wants the item (any positive rate in their matrix)
-            for give_item_idx in range(len(self.items_list)):
-                if other_matrix[give_item_idx, item_idx] > 0:
-                    market_demand += 1
-                    break  # This agent wants the item
-
+        # Market availability: count how many agents are willing to trade for
+        # each item (any positive rate in that item's column of their matrix)
+        snapshot = _get_market_snapshot(market_data)
+        total_agents = snapshot.num_others(self.agent_id)
+        if total_agents > 0:
+            market_demand = snapshot.others_demand(self.agent_id)
+            market_factor = market_demand / total_agents
+        else:
+            market_factor = np.full(self.num_items, 0.1)
         # Market availability factor (0.1 to 1.0)
-        market_factor = (
-            (market_demand / max(total_agents, 1)) if total_agents > 0 else 0.1
-        )
-        market_factor = max(0.1, min(1.0, market_factor))
+        market_factor = np.clip(market_factor, 0.1, 1.0)
 
         # Base strategic value
-        strategic_value = best_conversion_rate * market_factor
+        strategic_values = best_conversion_rates * market_factor
 
         # Apply discount for indirect trading (prefer direct paths)
-        # Estimate path length based on conversion rate quality
-        if best_conversion_rate >= 0.8:
-            path_discount = 1.0  # Likely direct or very good path
-        elif best_conversion_rate >= 0.4:
-            path_discount = 0.7  # Likely 2-hop path
-        else:
-            path_discount = 0.4  # Likely 3+ hop path
-
-        strategic_value *= path_discount
+        # Estimate path length based on conversion rate quality:
+        # likely direct (1.0), likely 2-hop (0.7), likely 3+ hop (0.4)
+        path_discount = np.where(
+            best_conversion_rates >= 0.8,
+            1.0,
+            np.where(best_conversion_rates >= 0.4, 0.7, 0.4),
+        )
+        strategic_values *= path_discount
 
         # Threshold: only consider items with meaningful strategic value
         min_threshold = 0.05
-        return strategic_value if strategic_value >= min_threshold else 0.0
+        strategic_values[
+            (best_conversion_rates <= 0) | (strategic_values < min_threshold)
+        ] = 0.0
 
-    def _get_recent_trade_partners(self, lookback_window=3):
-        """
-        Get agents we've recently traded with to avoid immediate cycles.
+        # Our desired item has maximum direct value
+        strategic_values[self.desired_item_idx] = 1.0
 
-        Args:
-            lookback_window: Number of recent trades to consider
+        self._strategic_cache = (market_data, strategic_values)
+        return strategic_values
 
-        Returns:
-            Dict mapping agent_id to list of recent trade info
+    def record_trade(self, trade_partner_id, item_given, item_received):
         """
-        recent_partners = defaultdict(list)
+        Record a completed trade in the recent-trade ring buffer.
 
-        # Look at last N trades
-        recent_trades = (
-            self.trade_history[-lookback_window:] if self.trade_history else []
+        Args:
+            trade_partner_id: ID of the agent we traded with
+            item_given: Item we gave
+            item_received: Item we received
+        """
+        partner_idx = self._partner_idx.setdefault(
+            trade_partner_id, len(self._partner_idx)
         )
+        self._trade_ring[self._trade_count % self.TRADE_RING_SIZE] = (
+            partner_idx,
+            self.item_to_idx.get(item_given, -1),
+            self.item_to_idx.get(item_received, -1),
+        )
+        self._trade_count += 1
 
-        for trade in recent_trades:
-            partner_id = trade["partner"]
-            trade_info = {
-                "gave": trade["given"][0],  # Item we gave
-                "received": trade["received"][0],  # Item we received
-                "timestep": trade["timestep"],
-            }
-            recent_partners[partner_id].append(trade_info)
-
-        return recent_partners
-
-    def _would_create_cycle(
-        self, target_agent_id, item_giving, item_wanting, recent_partners
-    ):
+    def _recent_trades(self, lookback_window=3):
         """
-        Check if this trade would create an immediate cycle.
+        Get the most recent trades from the ring buffer, oldest first.
 
         Args:
-            target_agent_id: ID of agent we want to trade with
-            item_giving: Item we're offering
-            item_wanting: Item we want
-            recent_partners: Recent trade partner information
+            lookback_window: Number of recent trades to consider
 
         Returns:
-            True if this would create a cycle, False otherwise
-        """
-        if target_agent_id not in recent_partners:
-            return False
-
-        # Check if we recently traded the reverse of this trade with the same agent
-        for trade_info in recent_partners[target_agent_id]:
-            # Cycle detected if:
-            # - We previously gave them item_wanting
-            # - We previously received item_giving from them
-            # This would mean: A gives X for Y to B, then A gives Y for X to B
-            if (
-                trade_info["gave"] == item_wanting
-                and trade_info["received"] == item_giving
-            ):
-                return True
-
-        return False
+            Array of (partner, item given, item received) index rows
+        """
+        count = min(lookback_window, self._trade_count, self.TRADE_RING_SIZE)
+        rows = np.arange(self._trade_count - count, self._trade_count)
+        return self._trade_ring[rows % self.TRADE_RING_SIZE]
 
-    def _calculate_cycle_penalty(self, target_agent_id, recent_partners):
+    def _cycle_mask(self, recent_matches, recent_trades):
         """
-        Calculate penalty for trading with recently traded partners.
+        Flag candidate trades that would reverse a recent trade with the same
+        partner (A gives X for Y to B, then A gives Y for X to B).
 
         Args:
-            target_agent_id: ID of potential trading partner
-            recent_partners: Recent trade partner information
+            recent_matches: Boolean array, [candidate, trade] True if that recent
+                trade was with that candidate
+            recent_trades: Recent trades as returned by _recent_trades
 
         Returns:
-            Penalty factor (0.0 to 1.0, where 1.0 = no penalty)
+            Boolean array indexed [candidate, item_wanting, item_giving], True
+            where the trade would reverse a recent trade with that candidate
+        """
+        mask = np.zeros(
+            (recent_matches.shape[0], self.num_items, self.num_items), dtype=bool
+        )
+        candidate_pos, trade_pos = np.nonzero(recent_matches)
+        gave_idx = recent_trades[trade_pos, 1]
+        received_idx = recent_trades[trade_pos, 2]
+        known = (gave_idx >= 0) & (received_idx >= 0)
+        # We previously gave item_wanting and received item_giving
+        mask[candidate_pos[known], gave_idx[known], received_idx[known]] = True
+        return mask
+
+    def _precompute_conversion_table(self, market_data, max_hops=3):
         """
-        if target_agent_id not in recent_partners:
-            return 1.0  # No penalty for new partners
+        Compute the best conversion rate between every pair of items.
+
+        Multi-hop search is a max-product matrix power over the best single-hop
+        rates offered by other agents, so the whole table is built with a few
+        NumPy reductions and cached for as long as market_data is unchanged.
 
-        # Calculate penalty based on how recent and frequent trades were
-        trade_count = len(recent_partners[target_agent_id])
+        Args:
+            market_data: Dictionary of other agents' trading matrices
+            max_hops: Maximum number of trading hops to consider
 
-        # More recent and frequent trades = higher penalty
-        if trade_count >= 3:
-            return 0.1  # Heavy penalty for frequent recent trading
-        elif trade_count >= 2:
-            return 0.3  # Moderate penalty
+        Returns:
+            Array where entry [i, j] is the best rate for converting item i to item j
+        """
+        cached_market, cached_hops, cached_table = self._conversion_cache
+        if cached_market is market_data and cached_hops == max_hops:
+            return cached_table
+
+        snapshot = _get_market_snapshot(market_data) if market_data else None
+
+        if snapshot is not None and snapshot.num_others(self.agent_id) > 0:
+            # Best rate any other agent offers for each single i -> j trade
+            single_hop = np.maximum(
+                snapshot.others_best_rates(self.agent_id), 0.0
+            ).astype(np.float64)
+            np.fill_diagonal(single_hop, 0.0)  # Trading an item for itself is not a hop
+            best_rates = _best_conversion_rates(single_hop, max_hops)
         else:
-            return 0.7  # Light penalty
+            best_rates = np.zeros((self.num_items, self.num_items))
+
+        np.fill_diagonal(best_rates, 1.0)
+
+        self._conversion_cache = (market_data, max_hops, best_rates)
+        return best_rates
 
     def _find_best_conversion_path(
         self, from_item_idx, to_item_idx, market_data, max_hops=3
@@ -525,8 +830,6 @@ class TradingAgent:
         """
         Find the best conversion rate from one item to another through trading paths.
 
-        Uses a breadth-first search with dynamic programming to find optimal paths.
-
         Args:
             from_item_idx: Index of starting item
             to_item_idx: Index of target item
@@ -536,147 +839,132 @@ class TradingAgent:
         Returns:
             Best conversion rate (how much of to_item we can get per unit of from_item)
         """
-        if from_item_idx == to_item_idx:
-            return 1.0
-
-        # Dynamic programming table: best_rate[item_idx][hops] = best rate to get to_item
-        best_rates = {}
-
-        # Initialize: direct trades (1 hop)
-        best_rates[from_item_idx] = {0: 1.0}  # We start with 1 unit of from_item
+        conversion_table = self._precompute_conversion_table(market_data, max_hops)
+        return float(conversion_table[from_item_idx, to_item_idx])
 
-        for hop in range(1, max_hops + 1):
-            new_rates = {}
-
-            # For each item we can currently reach
-            for current_item_idx in best_rates:
-                if hop - 1 not in best_rates[current_item_idx]:
-                    continue
-
-                current_rate = best_rates[current_item_idx][hop - 1]
-                if current_rate <= 0:
-                    continue
-
-                # Try trading with each other agent
-                for agent_id, other_matrix in market_data.items():
-                    if agent_id == self.agent_id:
-                        continue
-
-                    # Check all possible items we can get from this agent
-                    for target_item_idx in range(len(self.items_list)):
-                        if target_item_idx == current_item_idx:
-                            continue
-
-                        # Rate: how much of target_item we get for 1 unit of current_item
-                        trade_rate = other_matrix[current_item_idx, target_item_idx]
-                        if trade_rate <= 0:
-                            continue
-
-                        # Total rate through this path
-                        total_rate = current_rate * trade_rate
+    def update_policy(self, reward):
+        """Update the agent's policy based on reward."""
+        train_step = self._record_reward(reward)
+        if train_step is not None:
+            _policy_train_step(self.network, self.optimizer, *train_step)
 
-                        # Update best rate for target_item at this hop count
-                        if target_item_idx not in new_rates:
-                            new_rates[target_item_idx] = {}
+    @classmethod
+    def update_policies(cls, agents, rewards, stacked_networks=None):
+        """
+        Update several agents' policies, batching the gradient computation.
 
-                        if hop not in new_rates[target_item_idx]:
-                            new_rates[target_item_idx][hop] = total_rate
-                        else:
-                            new_rates[target_item_idx][hop] = max(
-                                new_rates[target_item_idx][hop], total_rate
-                            )
+        The agents due for a training step share one batched forward and
+        backward; each then applies its own optimizer step. Falls back to
+        per-agent training steps when the networks cannot be batched.
 
-            # Merge new rates into best_rates
-            for item_idx, hop_rates in new_rates.items():
-                if item_idx not in best_rates:
-                    best_rates[item_idx] = {}
-                best_rates[item_idx].update(hop_rates)
+        Args:
+            agents: Agents to update
+            rewards: Reward of each agent, in the same order
+            stacked_networks: StackedNetworks providing the batched backward
+        """
+        due = []
+        for agent, reward in zip(agents, rewards):
+            train_step = agent._record_reward(reward)
+            if train_step is not None:
+                due.append((agent, train_step))
 
-        # Find the best rate to reach to_item_idx across all hop counts
-        if to_item_idx not in best_rates:
-            return 0.0
+        networks = [agent.network for agent, _ in due]
+        if (
+            len(due) < 2
+            or stacked_networks is None
+            or not stacked_networks.supports(networks)
+        ):
+            for agent, train_step in due:
+                _policy_train_step(agent.network, agent.optimizer, *train_step)
+            return
+
+        for agent, _ in due:
+            agent.optimizer.zero_grad(set_to_none=True)
+        stacked_networks.mse_gradients(
+            networks,
+            torch.stack([state for _, (state, _) in due]),
+            torch.stack([target for _, (_, target) in due]),
+        )
+        for agent, _ in due:
+            agent.optimizer.step()
+            agent.network.weights_version += 1
 
-        best_rate = 0.0
-        for hop in range(1, max_hops + 1):
-            if hop in best_rates[to_item_idx]:
-                # Apply diminishing returns for longer paths
-                hop_penalty = 0.9 ** (hop - 1)  # Each additional hop reduces value
-                adjusted_rate = best_rates[to_item_idx][hop] * hop_penalty
-                best_rate = max(best_rate, adjusted_rate)
+    def _record_reward(self, reward):
+        """
+        Record a reward and work out the policy training step it triggers.
 
-        return best_rate
+        Args:
+            reward: Reward for the current timestep
 
-    def update_policy(self, reward):
-        """Update the agent's policy based on reward."""
+        Returns:
+            (state, target) tensors to regress the network on, or None when
+            no update is due this timestep
+        """
         self.reward_history.append(reward)
+        self._reward_count += 1
 
         # Simple policy gradient update - but only occasionally to slow learning
         if (
-            len(self.reward_history) >= 2 and len(self.reward_history) % 5 == 0
+            self._reward_count >= 2 and self._reward_count % 5 == 0
         ):  # Update every 5 timesteps
             # Calculate advantage (reward improvement)
             advantage = reward - self.reward_history[-2]
 
             # Update network if we have enough experience
-            if len(self.trade_history) > 0:
+            if self._trade_count > 0:
                 # Use last state and action for update
                 last_state = self.get_state_vector()
 
                 # Create target (current trading matrix + advantage signal)
-                target = torch.FloatTensor(self.trading_matrix.flatten())
                 if advantage > 0:
-                    target *= 1.005  # Much smaller increase (was 1.01)
+                    scale = 1.005  # Much smaller increase (was 1.01)
                 else:
-                    target *= 0.995  # Much smaller decrease (was 0.99)
-
-                # Forward pass
-                predicted = self.network(last_state.unsqueeze(0))
+                    scale = 0.995  # Much smaller decrease (was 0.99)
+                target = torch.from_numpy(self.trading_matrix.reshape(-1) * scale)
 
-                # Calculate loss
-                loss = F.mse_loss(predicted, target.unsqueeze(0))
-
-                # Backward pass
-                self.optimizer.zero_grad()
-                loss.backward()
-                self.optimizer.step()
+                return last_state, target
+        return None
 
     def execute_trade(
         self, trade_partner_id, item_given, amount_given, item_received, amount_received
     ):
         """Execute a trade transaction."""
+        given_idx = self.item_to_idx[item_given]
+
         # Update inventory
-        self.inventory[item_given] -= amount_given
-        self.inventory[item_received] += amount_received
+        self.inventory_arr[given_idx] -= amount_given
+        self.inventory_arr[self.item_to_idx[item_received]] += amount_received
 
         # Ensure non-negative inventory
-        self.inventory[item_given] = max(0, self.inventory[item_given])
+        self.inventory_arr[given_idx] = max(0, self.inventory_arr[given_idx])
 
         # Record trade
-        trade_record = {
-            "partner": trade_partner_id,
-            "given": (item_given, amount_given),
-            "received": (item_received, amount_received),
-            "timestep": len(self.trade_history),
-        }
-        self.trade_history.append(trade_record)
+        self.record_trade(trade_partner_id, item_given, item_received)
         self.successful_trades += 1
 
-        logger.debug(
-            f"Agent {self.agent_id} traded {amount_given} {item_given} for {amount_received} {item_received}"
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Agent %s traded %s %s for %s %s",
+                self.agent_id,
+                amount_given,
+                item_given,
+                amount_received,
+                item_received,
+            )
 
     def reset_for_new_generation(self):
         """Reset agent state for a new generation."""
         # Reset to fresh random inventory to prevent depletion
-        self.inventory = {item: np.random.randint(5, 20) for item in self.items_list}
-        self.generation_start_inventory = self.inventory.copy()
+        self.inventory_arr[:] = self._rng.integers(5, 20, self.num_items)
+        self.generation_start_inventory_arr[:] = self.inventory_arr
         self.successful_trades = 0
         self.attempted_trades = 0
-        self.trade_history = []
+        self._trade_count = 0
+        self._partner_idx = {}
         # Keep reward history for learning
 
         # Reset position to encourage spatial diversity
-        self.position = np.random.uniform(
+        self.position = self._rng.uniform(
             0, self.config["environment"]["world_size"], 2
         )
 
@@ -684,71 +972,140 @@ class TradingAgent:
         """Calculate fitness score for genetic algorithm selection."""
         return self.calculate_reward(market_data)
 
+    def inherit_from(self, parent):
+        """
+        Copy a parent's network weights and optimizer moments into this agent.
+
+        Tensors are copied parameter by parameter instead of round-tripping
+        both state_dicts through load_state_dict.
+
+        Args:
+            parent: Agent with the same network architecture
+        """
+        pairs = list(zip(self.network.parameters(), parent.network.parameters()))
+        with torch.no_grad():
+            for param, parent_param in pairs:
+                param.copy_(parent_param)
+        self.network.weights_version += 1
+
+        for param, parent_param in pairs:
+            parent_state = parent.optimizer.state.get(parent_param)
+            if parent_state:
+                self.optimizer.state[param] = {
+                    key: value.clone() if torch.is_tensor(value) else value
+                    for key, value in parent_state.items()
+                }
+
     def mutate(self, mutation_rate=0.1):
         """Apply mutation to the agent's parameters."""
-        if np.random.random() < mutation_rate:
+        if self._rng.random() < mutation_rate:
             # Mutate neural network weights with stronger noise
             with torch.no_grad():
-                for param in self.network.parameters():
-                    noise = (
-                        torch.randn_like(param) * 0.05
-                    )  # Increased from 0.01 to 0.05
-                    param.add_(noise)
+                params = list(self.network.parameters())
+                noise = [torch.randn_like(param).mul_(0.05) for param in params]
+                torch._foreach_add_(params, noise)  # Increased from 0.01 to 0.05
+            self.network.weights_version += 1
 
         # Mutate trading matrix directly to add diversity
-        if np.random.random() < mutation_rate:
-            matrix_noise = np.random.normal(
-                0, 0.3, self.trading_matrix.shape
-            )  # Increased from 0.1 to 0.3
-            self.trading_matrix += matrix_noise
+        if self._rng.random() < mutation_rate:
+            # Noise drawn directly in float32, the matrix's dtype
+            noise = self._rng.standard_normal(
+                self.trading_matrix.shape, dtype=np.float32
+            )
+            noise *= 0.3  # Increased from 0.1 to 0.3
+            self.trading_matrix += noise
             # Keep values positive and within bounds
-            self.trading_matrix = np.maximum(self.trading_matrix, 0.1)
-            self.trading_matrix = np.minimum(self.trading_matrix, 10.0)
+            np.clip(self.trading_matrix, 0.1, 10.0, out=self.trading_matrix)
             # Ensure diagonal stays 1
             np.fill_diagonal(self.trading_matrix, 1.0)
 
         # Mutate position slightly
-        position_noise = np.random.normal(0, 1.0, 2)
+        position_noise = self._rng.normal(0, 1.0, 2)
         self.position += position_noise
 
         # Keep position within bounds
         world_size = self.config["environment"]["world_size"]
-        self.position = np.clip(self.position, 0, world_size)
+        np.clip(self.position, 0, world_size, out=self.position)
 
-    def save_model(self, filepath):
-        """Save agent's neural network state."""
+    def save_model(self, filepath, include_optimizer=True):
+        """
+        Save agent's neural network state.
+
+        Args:
+            filepath: Checkpoint path
+            include_optimizer: Also save the Adam state, which is about twice
+                the size of the network; only needed to resume training
+        """
         try:
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            save_dir = os.path.dirname(filepath)
+            if save_dir != self._save_dir:
+                os.makedirs(save_dir, exist_ok=True)
+                self._save_dir = save_dir
+            # Arrays are stored as tensors so the checkpoint loads with
+            # weights_only=True
             checkpoint = {
                 "network_state_dict": self.network.state_dict(),
-                "optimizer_state_dict": self.optimizer.state_dict(),
                 "agent_id": self.agent_id,
                 "desired_item": self.desired_item,
-                "inventory": self.inventory,
-                "trading_matrix": self.trading_matrix,
-                "position": self.position,
-                "reward_history": self.reward_history,
+                "inventory": dict(self.inventory),
+                "trading_matrix": torch.from_numpy(self.trading_matrix),
+                "position": torch.from_numpy(self.position),
+                "reward_history": [float(r) for r in self.reward_history],
+                "reward_count": self._reward_count,
             }
-            torch.save(checkpoint, filepath)
+            if include_optimizer:
+                checkpoint["optimizer_state_dict"] = self.optimizer.state_dict()
+            torch.save(checkpoint, filepath, _use_new_zipfile_serialization=False)
             logger.info(f"Agent {self.agent_id} model saved to {filepath}")
         except Exception as e:
             logger.error(f"Failed to save agent {self.agent_id} model: {e}")
 
-    def load_model(self, filepath):
-        """Load agent's neural network state."""
+    def load_model(self, filepath, trusted=False):
+        """
+        Load agent's neural network state.
+
+        Args:
+            filepath: Checkpoint path
+            trusted: Fully unpickle the checkpoint, as older checkpoints that
+                stored NumPy arrays require; only for files from a trusted source
+        """
         if os.path.exists(filepath):
             try:
-                checkpoint = torch.load(
-                    filepath, map_location="cpu", weights_only=False
-                )
+                if trusted:
+                    logger.warning(
+                        "Fully unpickling checkpoint %s; only load trusted files",
+                        filepath,
+                    )
+                try:
+                    checkpoint = torch.load(
+                        filepath, map_location="cpu", weights_only=not trusted
+                    )
+                except pickle.UnpicklingError:
+                    logger.error(
+                        "Checkpoint %s is not weights-only (older checkpoints "
+                        "stored NumPy arrays); pass trusted=True to load it "
+                        "if it comes from a trusted source",
+                        filepath,
+                    )
+                    return False
                 self.network.load_state_dict(checkpoint["network_state_dict"])
-                self.optimizer.load_state_dict(checkpoint["optimizer_state_dict"])
-                self.inventory = checkpoint.get("inventory", self.inventory)
-                self.trading_matrix = checkpoint.get(
-                    "trading_matrix", self.trading_matrix
+                self.network.weights_version += 1
+                if "optimizer_state_dict" in checkpoint:
+                    self.optimizer.load_state_dict(checkpoint["optimizer_state_dict"])
+                if "inventory" in checkpoint:
+                    self.inventory = checkpoint["inventory"]
+                self.trading_matrix = np.asarray(
+                    checkpoint.get("trading_matrix", self.trading_matrix),
+                    dtype=np.float32,
+                )
+                self.position = np.asarray(
+                    checkpoint.get("position", self.position), dtype=np.float64
+                )
+                self.reward_history.clear()
+                self.reward_history.extend(checkpoint.get("reward_history", []))
+                self._reward_count = checkpoint.get(
+                    "reward_count", len(self.reward_history)
                 )
-                self.position = checkpoint.get("position", self.position)
-                self.reward_history = checkpoint.get("reward_history", [])
                 logger.info(f"Agent {self.agent_id} model loaded from {filepath}")
                 return True
             except Exception as e:
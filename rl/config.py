@@ -26,7 +26,8 @@ def load_config():
             },
             'learning': {
                 'learning_rate': 0.001,  # Learning rate for neural network optimization
-                'matrix_update_rate': 0.1  # Rate at which trading matrix is updated
+                'matrix_update_rate': 0.1,  # Rate at which trading matrix is updated
+                'reward_history_len': 1024  # Most recent rewards kept per agent
             },
             'training': {
                 'max_generations': 100,  # Maximum number of generations to run
@@ -35,12 +36,15 @@ def load_config():
                 'model_save_path': 'models/trading_agents',  # Directory to save models
                 'log_frequency': 10,  # Log summary every N timesteps
                 'early_stopping_patience': 20,  # Stop if no improvement for N generations
-                'target_fitness': 100.0  # Target fitness to consider problem solved
+                'target_fitness': 100.0,  # Target fitness to consider problem solved
+                'torch_threads': 1  # PyTorch CPU threads per process (0 = PyTorch default)
             },
             'server': {
                 'host': '0.0.0.0',  # Web server host
                 'port': 8080,  # Web server port
-                'debug': False  # Flask debug mode
+                'debug': False,  # Flask debug mode
+                'production': True,  # Serve with waitress when installed (ignored in debug mode)
+                'threads': 4  # waitress worker threads
             },
             'logging': {
                 'level': 'INFO',  # Logging level
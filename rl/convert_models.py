@@ -12,17 +12,17 @@ Usage:
     python convert_models.py --create-example   # Generate NPU usage example
 """
 
-import sys
-import os
 import logging
 
-# Add current directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-from onnx_conversion import main as onnx_main
 
 def main():
     """Main entry point for the conversion script."""
+    # Imported here so the module itself stays cheap to import
+    try:
+        from .onnx_conversion import main as onnx_main
+    except ImportError:
+        from onnx_conversion import main as onnx_main
+
     # Set up logging
     logging.basicConfig(
         level=logging.INFO,
@@ -3,21 +3,66 @@
 Debug script to test Socket.IO connection and event reception.
 """
 
+import argparse
+import array
+import concurrent.futures
 import socketio
 import logging
+import sys
+import threading
 import time
 import json
 
-# Setup detailed logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from utils import start_queue_logging
+
+# Optional faster JSON decoding for incoming frames
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
-def test_socket_connection():
-    """Test basic Socket.IO connection and event handling."""
+# Slots of the per-event counters
+CONNECT, DISCONNECT, START_SIMULATION, OTHER = range(4)
+
+
+class _OrjsonCodec:
+    """json module stand-in for Socket.IO: orjson decodes, stdlib encodes.
+
+    Socket.IO encodes with json.dumps keyword arguments orjson does not accept,
+    and only incoming payloads are large, so just decoding is swapped.
+    """
+
+    dumps = staticmethod(json.dumps)
+
+    @staticmethod
+    def loads(s):
+        return orjson.loads(s)
+
+
+def setup_debug_logging():
+    """Setup detailed debug logging; returns the listener that writes the records."""
+    handler = logging.StreamHandler()
+    handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+    listener = start_queue_logging([handler], level=logging.DEBUG)
+
+    # Keep the Socket.IO libraries quiet unless --trace passes them a logger
+    logging.getLogger('socketio').setLevel(logging.WARNING)
+    logging.getLogger('engineio').setLevel(logging.WARNING)
+    return listener
+
+
+def test_socket_connection(verbose=False, trace=False):
+    """
+    Test basic Socket.IO connection and event handling.
+
+    Args:
+        verbose: Also print full payload details (keys, bot ids, event args)
+        trace: Log every Socket.IO / Engine.IO frame, ping and pong
+    """
     
     url = 'https://geographical-clonic-jimena.ngrok-free.dev'  # Base URL without /model
     
@@ -26,58 +71,75 @@ def test_socket_connection():
     print(f"Target URL: {url}")
     print()
     
-    # Create client with verbose logging
+    # Per-frame library logging is opt-in: it logs several records per frame
     sio = socketio.Client(
-        logger=True,
-        engineio_logger=True,
+        logger=trace,
+        engineio_logger=trace,
         reconnection=True,
         reconnection_attempts=3,
-        reconnection_delay=2
+        reconnection_delay=2,
+        json=_OrjsonCodec if orjson is not None else None
     )
     
-    # Event counters
-    events_received = {
-        'connect': 0,
-        'disconnect': 0,
-        'start_simulation': 0,
-        'other': 0
-    }
+    # Event counters indexed by CONNECT/DISCONNECT/START_SIMULATION/OTHER;
+    # only the client's receive thread increments them
+    events_received = array.array('Q', [0, 0, 0, 0])
+
+    # Set when there is nothing left to wait for: data arrived or we disconnected
+    done = threading.Event()
+
+    # Payload diagnostics run here, keeping the receive thread free for frames
+    diagnostics = concurrent.futures.ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix='sio-diag'
+    )
+
+    def report_start_simulation(data, received_at):
+        inventory_map = data.get('botInventoryMap') if isinstance(data, dict) else None
+        lines = [f"🚀 start_simulation received at {received_at}"]
+        if verbose:
+            lines.append(f"📊 Data type: {type(data)}")
+            lines.append(f"📊 Data keys: {list(data) if isinstance(data, dict) else 'Not a dict'}")
+        if inventory_map is not None:
+            lines.append(f"🤖 Bot count: {len(inventory_map)}")
+            if verbose:
+                lines.append(f"🤖 Bot keys: {list(inventory_map)}")
+        # One write per event instead of one print per line
+        print("\n".join(lines))
     
     @sio.event(namespace='/model')
     def connect():
         logger.info("🎉 CONNECTED to /model namespace successfully!")
-        events_received['connect'] += 1
+        events_received[CONNECT] += 1
         print(f"✅ /model namespace connection established at {time.strftime('%H:%M:%S')}")
         
     @sio.event(namespace='/model')
     def connect_error(data):
-        logger.error(f"❌ /model namespace connection error: {data}")
+        logger.error("❌ /model namespace connection error: %s", data)
         print(f"❌ /model namespace connection failed: {data}")
         
     @sio.event(namespace='/model')
     def disconnect():
         logger.info("🔌 Disconnected from /model namespace")
-        events_received['disconnect'] += 1
+        events_received[DISCONNECT] += 1
+        done.set()
         print(f"🔌 Disconnected from /model namespace at {time.strftime('%H:%M:%S')}")
         
     @sio.event(namespace='/model')
     def start_simulation(data):
         logger.info("🚀 RECEIVED start_simulation event from /model namespace!")
-        events_received['start_simulation'] += 1
-        print(f"🚀 start_simulation received at {time.strftime('%H:%M:%S')}")
-        print(f"📊 Data type: {type(data)}")
-        print(f"📊 Data keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
-        if isinstance(data, dict) and 'botInventoryMap' in data:
-            bot_count = len(data['botInventoryMap'])
-            print(f"🤖 Bot count: {bot_count}")
-            print(f"🤖 Bot keys: {list(data['botInventoryMap'].keys())}")
+        events_received[START_SIMULATION] += 1
+        diagnostics.submit(report_start_simulation, data, time.strftime('%H:%M:%S'))
+        done.set()
         
     # Catch-all for any other events in /model namespace
     @sio.event(namespace='/model')
     def catch_all(event, *args):
-        logger.info(f"🔍 /model Event '{event}' received with {len(args)} args")
-        events_received['other'] += 1
-        print(f"🔍 /model Event: {event}, Args: {args}")
+        logger.info("🔍 /model Event '%s' received with %d args", event, len(args))
+        events_received[OTHER] += 1
+        if verbose:
+            print(f"🔍 /model Event: {event}, Args: {args}")
+        else:
+            print(f"🔍 /model Event: {event}")
     
     try:
         print("🔌 Attempting connection...")
@@ -85,31 +147,41 @@ def test_socket_connection():
         # Add ngrok headers
         headers = {'ngrok-skip-browser-warning': 'true'}
         
-        sio.connect(
-            url,
-            headers=headers,
-            transports=['websocket', 'polling'],
-            wait_timeout=15,
-            namespaces=['/model']
-        )
+        # Connect straight over WebSocket, skipping the long-polling handshake
+        # and upgrade round trip; fall back to polling only if that fails
+        try:
+            sio.connect(
+                url,
+                headers=headers,
+                transports=['websocket'],
+                wait_timeout=15,
+                namespaces=['/model']
+            )
+        except socketio.exceptions.ConnectionError as e:
+            print(f"⚠️  WebSocket connection failed ({e}), retrying with polling...")
+            sio.connect(
+                url,
+                headers=headers,
+                transports=['polling'],
+                wait_timeout=15,
+                namespaces=['/model']
+            )
         
         print(f"🎯 Connection status: {'Connected' if sio.connected else 'Failed'}")
         
         if sio.connected:
             print("✅ Connection successful!")
-            print("⏳ Waiting for events (60 seconds)...")
+            print("⏳ Waiting for events (up to 60 seconds)...")
             print("   - Listening for 'start_simulation' events")
             print("   - Press Ctrl+C to stop")
             
-            # Wait for events
-            start_time = time.time()
-            while time.time() - start_time < 60:
-                time.sleep(1)
-                
-                # Print status every 10 seconds
-                if int(time.time() - start_time) % 10 == 0:
-                    elapsed = int(time.time() - start_time)
-                    print(f"⏱️  {elapsed}s elapsed - Events: {sum(events_received.values())}")
+            # Sleep until an event ends the wait, printing status every 10 seconds;
+            # ticks are fixed monotonic deadlines so printing time does not drift
+            start_time = time.monotonic()
+            for elapsed in range(10, 61, 10):
+                if done.wait(timeout=max(0.0, start_time + elapsed - time.monotonic())):
+                    break
+                sys.stdout.write("⏱️  %ds elapsed - Events: %d\n" % (elapsed, sum(events_received)))
                     
         else:
             print("❌ Connection failed!")
@@ -118,22 +190,24 @@ def test_socket_connection():
         print("\n🛑 Interrupted by user")
     except Exception as e:
         print(f"❌ Error: {e}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        # The traceback goes to the log handlers; stdout gets the one-line error
+        logger.exception("Socket debug failed")
     finally:
         if sio.connected:
             sio.disconnect()
+        # Let pending payload reports print before the summary
+        diagnostics.shutdown(wait=True)
             
         print("\n📊 Final Results:")
-        print(f"   Connect events: {events_received['connect']}")
-        print(f"   Disconnect events: {events_received['disconnect']}")
-        print(f"   start_simulation events: {events_received['start_simulation']}")
-        print(f"   Other events: {events_received['other']}")
-        print(f"   Total events: {sum(events_received.values())}")
+        print(f"   Connect events: {events_received[CONNECT]}")
+        print(f"   Disconnect events: {events_received[DISCONNECT]}")
+        print(f"   start_simulation events: {events_received[START_SIMULATION]}")
+        print(f"   Other events: {events_received[OTHER]}")
+        print(f"   Total events: {sum(events_received)}")
         
-        if events_received['start_simulation'] > 0:
+        if events_received[START_SIMULATION] > 0:
             print("🎉 SUCCESS: start_simulation events were received!")
-        elif events_received['connect'] > 0:
+        elif events_received[CONNECT] > 0:
             print("⚠️  Connected but no start_simulation events received")
             print("   - Check if server is sending the events")
             print("   - Verify event name spelling")
@@ -145,4 +219,21 @@ def test_socket_connection():
 
 
 if __name__ == "__main__":
-    test_socket_connection()
+    parser = argparse.ArgumentParser(description='Debug Socket.IO connection and events')
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='Print full payload details for every received event'
+    )
+    parser.add_argument(
+        '--trace',
+        action='store_true',
+        help='Log every Socket.IO/Engine.IO frame (slow, very noisy)'
+    )
+    args = parser.parse_args()
+
+    listener = setup_debug_logging()
+    try:
+        test_socket_connection(verbose=args.verbose, trace=args.trace)
+    finally:
+        listener.stop()
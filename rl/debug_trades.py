@@ -4,25 +4,33 @@ Debug script to understand why trades aren't being emitted.
 """
 
 import logging
+import logging.handlers
 import sys
 import os
 
-# Add current directory to path so we can import modules
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Add this script's directory to path so we can import modules, once
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
 
 from config import load_config
-from utils import setup_logging
+from utils import setup_logging, start_queue_logging
 
 # Setup detailed logging
 def setup_debug_logging():
-    """Setup detailed debug logging."""
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler('debug_trades.log')
-        ]
+    """Setup detailed debug logging; returns the listener that writes the records."""
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    # The log file is opened on first write, and records are written in
+    # batches of 512 (errors immediately) instead of one write per record
+    file_handler = logging.FileHandler('debug_trades.log', delay=True)
+    file_handler.setFormatter(formatter)
+    buffered_file_handler = logging.handlers.MemoryHandler(
+        capacity=512, flushLevel=logging.ERROR, target=file_handler
+    )
+    listener = start_queue_logging(
+        [stream_handler, buffered_file_handler], level=logging.DEBUG
     )
     
     # Set specific loggers to DEBUG
@@ -30,10 +38,11 @@ def setup_debug_logging():
     logging.getLogger('unified_app').setLevel(logging.DEBUG)
     logging.getLogger('environment').setLevel(logging.DEBUG)
     logging.getLogger('agent').setLevel(logging.DEBUG)
+    return listener
 
 def main():
     """Main debug function."""
-    setup_debug_logging()
+    listener = setup_debug_logging()
     logger = logging.getLogger(__name__)
     
     print("🐛 Debug: Starting trade emission debug...")
@@ -54,40 +63,39 @@ def main():
         # Import here after setting up logging
         from unified_app import UnifiedTradingApp
         
-        # Create unified app
+        # Create unified app; leaving the block shuts it down
         logger.info("Creating UnifiedTradingApp...")
-        app = UnifiedTradingApp(config)
-        
-        # Create test inventory map with diverse inventories to encourage trading
-        test_inventory_map = {
-            "0-0": {"diamond": 10, "gold": 0, "apple": 0, "emerald": 0, "redstone": 0},
-            "1-1": {"diamond": 0, "gold": 10, "apple": 0, "emerald": 0, "redstone": 0},
-            "2-2": {"diamond": 0, "gold": 0, "apple": 10, "emerald": 0, "redstone": 0}
-        }
-        
-        logger.info("Starting external simulation with test data...")
-        logger.info(f"Test inventory map: {test_inventory_map}")
-        
-        # Start external simulation
-        app._start_external_simulation({'botInventoryMap': test_inventory_map})
-        
-        # Let it run for a few timesteps
-        import time
-        logger.info("Running simulation for 5 seconds...")
-        time.sleep(5)
-        
-        logger.info("Stopping simulation...")
-        app._stop_external_simulation()
+        with UnifiedTradingApp(config) as app:
+            # Create test inventory map with diverse inventories to encourage trading
+            test_inventory_map = {
+                "0-0": {"diamond": 10, "gold": 0, "apple": 0, "emerald": 0, "redstone": 0},
+                "1-1": {"diamond": 0, "gold": 10, "apple": 0, "emerald": 0, "redstone": 0},
+                "2-2": {"diamond": 0, "gold": 0, "apple": 10, "emerald": 0, "redstone": 0}
+            }
+            
+            logger.info("Starting external simulation with test data...")
+            logger.info("Test inventory map: %s", test_inventory_map)
+            
+            # Start external simulation
+            app._start_external_simulation({'botInventoryMap': test_inventory_map})
+            
+            # Let it run until one generation completes (at most 5 seconds)
+            logger.info("Running simulation for one generation...")
+            if not app.external_generation_done.wait(timeout=5.0):
+                logger.warning("Simulation did not finish a generation within 5 seconds")
+            
+            logger.info("Stopping simulation...")
+            app._stop_external_simulation()
         
         logger.info("Debug completed!")
         
     except Exception as e:
-        logger.error(f"Debug failed: {e}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Debug failed: %s", e)
     finally:
-        if 'app' in locals():
-            app.shutdown()
+        listener.stop()
+        # Write out records still held by the buffered file handler
+        for handler in listener.handlers:
+            handler.flush()
 
 if __name__ == "__main__":
     main()
@@ -7,30 +7,34 @@ trading agent models. Since it might be run in environments without PyTorch
 installed, this provides examples and documentation.
 """
 
-def demo_basic_usage():
-    """Demonstrate basic ONNX conversion usage."""
-    print("=" * 60)
-    print("BlockMarket ONNX Conversion System Demo")
-    print("=" * 60)
-    
-    print("\nBasic Usage Examples:")
-    print("\n1. Convert all models in the models directory:")
-    print("   python convert_models.py")
-    
-    print("\n2. Convert a specific model:")
-    print("   python convert_models.py --model-path models/trading_agents/agent_final.pth")
-    
-    print("\n3. Create NPU inference example:")
-    print("   python convert_models.py --create-example")
-    
-    print("\n4. Show help:")
-    print("   python convert_models.py --help")
+import sys
+
+# The demo is static text: each section is a module-level constant and the
+# whole demo is written to stdout in one call.
+
+BASIC_USAGE = """\
+============================================================
+BlockMarket ONNX Conversion System Demo
+============================================================
+
+Basic Usage Examples:
+
+1. Convert all models in the models directory:
+   python convert_models.py
+
+2. Convert a specific model:
+   python convert_models.py --model-path models/trading_agents/agent_final.pth
+
+3. Create NPU inference example:
+   python convert_models.py --create-example
+
+4. Show help:
+   python convert_models.py --help
+"""
+
+PROGRAMMATIC_USAGE = '''
+Programmatic Usage:
 
-def demo_programmatic_usage():
-    """Show programmatic usage examples."""
-    print("\nProgrammatic Usage:")
-    
-    code_example = '''
 from onnx_conversion import ONNXConverter
 
 # Create converter with default config
@@ -53,30 +57,24 @@ if success:
 
 # Create NPU inference example
 converter.save_inference_example()
+
 '''
-    
-    print(code_example)
 
-def demo_output_structure():
-    """Show expected output structure."""
-    print("\nOutput Structure:")
-    
-    structure = '''
+OUTPUT_STRUCTURE = '''
+Output Structure:
+
 models/trading_agents/onnx/
   agent_final.onnx                    # ONNX model for NPU
   agent_final_metadata.json          # Model info & NPU hints
   agent_gen50_rank1.onnx             # Another converted model
   agent_gen50_rank1_metadata.json    # Corresponding metadata
   npu_inference_example.py           # Ready-to-use NPU code
+
 '''
-    
-    print(structure)
 
-def demo_npu_benefits():
-    """Explain NPU acceleration benefits."""
-    print("\nNPU Acceleration Benefits:")
-    
-    benefits = '''
+NPU_BENEFITS = '''
+NPU Acceleration Benefits:
+
 On Qualcomm Snapdragon X Elite with NPU:
 
 Performance Improvements:
@@ -90,15 +88,12 @@ Key Features:
 - Dedicated neural processing hardware
 - Optimized for real-time inference workloads
 - Perfect for multi-agent trading simulations
+
 '''
-    
-    print(benefits)
 
-def demo_integration():
-    """Show integration with existing training system."""
-    print("\nIntegration Examples:")
-    
-    integration_code = '''
+INTEGRATION = '''
+Integration Examples:
+
 # Option 1: Manual conversion after training
 from onnx_conversion import ONNXConverter
 
@@ -127,15 +122,12 @@ class NPUTradingAgent(TradingAgent):
         state = self.get_state_vector(market_data)
         outputs = self.onnx_session.run(None, {'state_vector': state.numpy()})
         return outputs[0]
+
 '''
-    
-    print(integration_code)
 
-def demo_requirements():
-    """Show installation requirements."""
-    print("\nInstallation Requirements:")
-    
-    requirements = '''
+REQUIREMENTS = '''
+Installation Requirements:
+
 # Install dependencies:
 pip install -r requirements.txt
 
@@ -147,28 +139,37 @@ onnxruntime>=1.15.0         # ONNX Runtime for inference
 # - Qualcomm AI Stack for Windows/Linux
 # - QNN execution provider
 # - Snapdragon X Elite device
+
 '''
-    
-    print(requirements)
+
+NEXT_STEPS = """
+============================================================
+Demo Complete!
+============================================================
+
+Next Steps:
+1. Install requirements: pip install -r requirements.txt
+2. Train some models to create .pth files
+3. Run: python convert_models.py
+4. Use generated ONNX models for NPU-accelerated inference
+
+See README_ONNX.md for detailed documentation.
+"""
+
+DEMO_TEXT = "".join([
+    BASIC_USAGE,
+    PROGRAMMATIC_USAGE,
+    OUTPUT_STRUCTURE,
+    NPU_BENEFITS,
+    INTEGRATION,
+    REQUIREMENTS,
+    NEXT_STEPS,
+])
+
 
 def main():
     """Main demo function."""
-    demo_basic_usage()
-    demo_programmatic_usage()
-    demo_output_structure()
-    demo_npu_benefits()
-    demo_integration()
-    demo_requirements()
-    
-    print("\n" + "=" * 60)
-    print("Demo Complete!")
-    print("=" * 60)
-    print("\nNext Steps:")
-    print("1. Install requirements: pip install -r requirements.txt")
-    print("2. Train some models to create .pth files")
-    print("3. Run: python convert_models.py")
-    print("4. Use generated ONNX models for NPU-accelerated inference")
-    print("\nSee README_ONNX.md for detailed documentation.")
+    sys.stdout.write(DEMO_TEXT)
 
 if __name__ == "__main__":
     main()
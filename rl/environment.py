@@ -4,6 +4,11 @@ import logging
 from collections import defaultdict
 from typing import Dict, List, Tuple, Optional
 
+try:
+    from .network import StackedNetworks
+except ImportError:
+    from network import StackedNetworks
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,6 +29,7 @@ class TradingEnvironment:
         self.max_trade_amount = env_config["max_trade_amount"]
         self.items_list = env_config["items_list"]
         self.num_items = len(self.items_list)
+        self.item_to_idx = {item: i for i, item in enumerate(self.items_list)}
 
         # Genetic algorithm parameters
         self.population_size = env_config["population_size"]
@@ -38,12 +44,28 @@ class TradingEnvironment:
         self.current_timestep = 0
         self.current_generation = 0
         self.market_data = {}  # agent_id -> trading_matrix
+        self.market_tensor = None  # (agents, items, items), rows back market_data
+        self.positions = None  # (agents, 2), rows back agent_positions
+        self._position_rows = {}  # agent_id -> row of positions
         self.agent_positions = {}  # agent_id -> (x, y)
 
+        # Batched forward over all agents' networks, restacked on weight changes
+        self._stacked_networks = StackedNetworks()
+
         # Statistics tracking
         self.generation_stats = []
         self.trade_history = []
 
+    @property
+    def agents(self):
+        """Current population, indexed by agent_id in ``_agents_by_id``."""
+        return self._agents
+
+    @agents.setter
+    def agents(self, agents):
+        self._agents = agents
+        self._agents_by_id = {agent.agent_id: agent for agent in agents}
+
     def initialize_agents(self, agent_class):
         """
         Initialize the population of trading agents.
@@ -51,7 +73,7 @@ class TradingEnvironment:
         Args:
             agent_class: Class to use for creating agents
         """
-        self.agents = []
+        agents = []
 
         for i in range(self.population_size):
             # Random desired item for each agent
@@ -65,9 +87,10 @@ class TradingEnvironment:
                 desired_item=desired_item,
             )
 
-            self.agents.append(agent)
+            agents.append(agent)
             self.agent_positions[agent.agent_id] = agent.position
 
+        self.agents = agents
         logger.info(f"Initialized {len(self.agents)} agents")
 
     def step(self) -> Dict:
@@ -112,17 +135,41 @@ class TradingEnvironment:
 
     def _update_trading_matrices(self):
         """Phase 1: Each agent updates its trading matrix."""
-        for agent in self.agents:
-            agent.update_trading_matrix(self.market_data)
+        # Sum the public matrices once; each agent subtracts its own entry.
+        # Offspring can reuse an agent_id, in which case market_data holds
+        # fewer matrices than market_tensor has rows
+        if not self.market_data:
+            market_sum = None
+        elif len(self.market_data) == len(self.market_tensor):
+            market_sum = self.market_tensor.sum(axis=0)
+        else:
+            market_sum = np.stack(list(self.market_data.values())).sum(axis=0)
+        if not self.agents:
+            return
+        type(self.agents[0]).update_trading_matrices(
+            self.agents, self.market_data, market_sum, self._stacked_networks
+        )
 
     def _collect_market_data(self):
         """Phase 2: Collect all trading matrices for public access."""
         self.market_data = {}
         self.agent_positions = {}
-
-        for agent in self.agents:
-            self.market_data[agent.agent_id] = agent.trading_matrix.copy()
-            self.agent_positions[agent.agent_id] = agent.position.copy()
+        self.market_tensor = None
+        self.positions = None
+        self._position_rows = {}
+        if not self.agents:
+            return
+
+        # Copy every public matrix and position into contiguous arrays with
+        # one row per agent; market_data and agent_positions hold row views
+        self.market_tensor = np.stack([agent.trading_matrix for agent in self.agents])
+        self.positions = np.stack([agent.position for agent in self.agents])
+        for row, (agent, matrix, position) in enumerate(
+            zip(self.agents, self.market_tensor, self.positions)
+        ):
+            self.market_data[agent.agent_id] = matrix
+            self.agent_positions[agent.agent_id] = position
+            self._position_rows[agent.agent_id] = row
 
     def _collect_trade_requests(self) -> List[Tuple]:
         """
@@ -141,7 +188,7 @@ class TradingEnvironment:
                 self.market_data, self.agent_positions
             )
 
-            logger.debug(f"Agent {agent.agent_id} trade action: {trade_action}")
+            logger.debug("Agent %s trade action: %s", agent.agent_id, trade_action)
 
             if trade_action is not None:
                 target_agent_id, item_giving, item_wanting, amount_wanting = (
@@ -162,14 +209,19 @@ class TradingEnvironment:
                         )
                     )
                     logger.debug(
-                        f"Valid trade request: {agent.agent_id} -> {target_agent_id}, {item_giving} for {item_wanting}"
+                        "Valid trade request: %s -> %s, %s for %s",
+                        agent.agent_id,
+                        target_agent_id,
+                        item_giving,
+                        item_wanting,
                     )
                 else:
                     logger.debug(
-                        f"Invalid trade request from {agent.agent_id}: insufficient resources"
+                        "Invalid trade request from %s: insufficient resources",
+                        agent.agent_id,
                     )
             else:
-                logger.debug(f"Agent {agent.agent_id} selected no trade action")
+                logger.debug("Agent %s selected no trade action", agent.agent_id)
 
         logger.info(
             f"Collected {len(trade_requests)} valid trade requests from {len(self.agents)} agents"
@@ -205,12 +257,7 @@ class TradingEnvironment:
             return False
 
         # Find target agent
-        target_agent = None
-        for agent in self.agents:
-            if agent.agent_id == target_agent_id:
-                target_agent = agent
-                break
-
+        target_agent = self._agents_by_id.get(target_agent_id)
         if target_agent is None:
             return False
 
@@ -219,11 +266,13 @@ class TradingEnvironment:
             return False
 
         # Check if target is willing to make this trade based on their trading matrix
-        item_giving_idx = self.items_list.index(item_giving)
-        item_wanting_idx = self.items_list.index(item_wanting)
+        item_giving_idx = self.item_to_idx[item_giving]
+        item_wanting_idx = self.item_to_idx[item_wanting]
 
         # Target's rate: how much of item_giving they want for 1 unit of item_wanting
-        target_rate = target_agent.trading_matrix[item_wanting_idx, item_giving_idx]
+        target_rate = float(
+            target_agent.trading_matrix[item_wanting_idx, item_giving_idx]
+        )
 
         if target_rate <= 0:
             return False
@@ -252,8 +301,7 @@ class TradingEnvironment:
         # Group requests by target agent
         requests_by_target = defaultdict(list)
         for request in trade_requests:
-            requester_id, target_id, item_giving, item_wanting, amount_wanting = request
-            requests_by_target[target_id].append(request)
+            requests_by_target[request[1]].append(request)
 
         # Process each target agent's incoming requests
         for target_id, requests in requests_by_target.items():
@@ -286,38 +334,28 @@ class TradingEnvironment:
         Returns:
             Selected request or None
         """
-        if target_id not in self.agent_positions:
+        position_rows = self._position_rows
+        if target_id not in position_rows:
             return None
 
-        target_pos = self.agent_positions[target_id]
-
-        # Calculate distances and probabilities
-        distances = []
-        for request in requests:
-            requester_id = request[0]
-            if requester_id in self.agent_positions:
-                requester_pos = self.agent_positions[requester_id]
-                distance = np.linalg.norm(
-                    np.array(target_pos) - np.array(requester_pos)
-                )
-                distances.append(distance)
-            else:
-                distances.append(float("inf"))
-
-        # Convert distances to probabilities (inverse relationship)
-        probabilities = []
-        for distance in distances:
-            if distance == float("inf"):
-                probabilities.append(0.0)
-            else:
-                probabilities.append(1.0 / (1.0 + distance))
-
-        # Normalize probabilities
-        total_prob = sum(probabilities)
-        if total_prob == 0:
+        # Requesters without a known position get zero probability
+        requester_rows = np.array(
+            [position_rows.get(request[0], -1) for request in requests]
+        )
+        known = requester_rows >= 0
+        if not known.any():
             return None
 
-        probabilities = [p / total_prob for p in probabilities]
+        distances = np.linalg.norm(
+            self.positions[requester_rows[known]]
+            - self.positions[position_rows[target_id]],
+            axis=1,
+        )
+
+        # Convert distances to probabilities (inverse relationship) and normalize
+        probabilities = np.zeros(len(requests))
+        probabilities[known] = 1.0 / (1.0 + distances)
+        probabilities /= probabilities.sum()
 
         # Select based on probability
         selected_idx = np.random.choice(len(requests), p=probabilities)
@@ -336,30 +374,19 @@ class TradingEnvironment:
         requester_id, target_id, item_giving, item_wanting, amount_wanting = request
 
         # Find agent objects
-        requester = None
-        target = None
+        requester = self._agents_by_id.get(requester_id)
+        target = self._agents_by_id.get(target_id)
 
-        for agent in self.agents:
-            if agent.agent_id == requester_id:
-                requester = agent
-            elif agent.agent_id == target_id:
-                target = agent
-
-        if not requester or not target:
-            return None
-
-        # Validate trade is still possible (double-check)
-        if not self._validate_trade_request(
-            requester, target_id, item_giving, item_wanting, amount_wanting
-        ):
+        # Offspring ids can repeat within a generation; never trade an id with itself
+        if not requester or not target or requester_id == target_id:
             return None
 
         # Calculate how much the requester needs to give based on target's trading matrix
-        item_giving_idx = self.items_list.index(item_giving)
-        item_wanting_idx = self.items_list.index(item_wanting)
+        item_giving_idx = self.item_to_idx[item_giving]
+        item_wanting_idx = self.item_to_idx[item_wanting]
 
         # Target's rate: how much of item_giving they want for 1 unit of item_wanting
-        target_rate = target.trading_matrix[item_wanting_idx, item_giving_idx]
+        target_rate = float(target.trading_matrix[item_wanting_idx, item_giving_idx])
 
         if target_rate <= 0:
             return None
@@ -367,11 +394,21 @@ class TradingEnvironment:
         # Calculate actual trade amounts
         required_giving_amount = amount_wanting / target_rate
 
+        # Requests were validated when collected, but trades executed earlier
+        # this step may have drawn either inventory down since; rates can't
+        # change within the step, so only the inventory checks are repeated
+        requester_has = requester.inventory[item_giving]
+        target_has = target.inventory[item_wanting]
+        if (
+            requester_has <= 0
+            or target_has < amount_wanting
+            or requester_has < required_giving_amount
+        ):
+            return None
+
         # Ensure we don't exceed available inventory
-        actual_giving_amount = min(
-            required_giving_amount, requester.inventory[item_giving]
-        )
-        actual_wanting_amount = min(amount_wanting, target.inventory[item_wanting])
+        actual_giving_amount = min(required_giving_amount, requester_has)
+        actual_wanting_amount = min(amount_wanting, target_has)
 
         # Recalculate based on what's actually available
         if actual_giving_amount * target_rate > actual_wanting_amount:
@@ -414,29 +451,21 @@ class TradingEnvironment:
         target.successful_trades += 1
 
         # Record trade in each agent's individual history
-        requester_trade_record = {
-            "partner": target_id,
-            "given": (item_giving, actual_giving_amount),
-            "received": (item_wanting, actual_wanting_amount),
-            "timestep": self.current_timestep,
-        }
-
-        target_trade_record = {
-            "partner": requester_id,
-            "given": (item_wanting, actual_wanting_amount),
-            "received": (item_giving, actual_giving_amount),
-            "timestep": self.current_timestep,
-        }
-
-        requester.trade_history.append(requester_trade_record)
-        target.trade_history.append(target_trade_record)
+        requester.record_trade(target_id, item_giving, item_wanting)
+        target.record_trade(requester_id, item_wanting, item_giving)
 
         self.trade_history.append(trade_info)
 
-        logger.debug(
-            f"Trade executed: {requester_id} gave {actual_giving_amount:.2f} {item_giving} "
-            f"for {actual_wanting_amount:.2f} {item_wanting} from {target_id}"
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Trade executed: %s gave %.2f %s for %.2f %s from %s",
+                requester_id,
+                actual_giving_amount,
+                item_giving,
+                actual_wanting_amount,
+                item_wanting,
+                target_id,
+            )
 
         return trade_info
 
@@ -447,35 +476,37 @@ class TradingEnvironment:
         Returns:
             Total reward across all agents
         """
-        total_reward = 0
+        if not self.agents:
+            return 0
 
-        for agent in self.agents:
-            # Pass market data to reward calculation for strategic value assessment
-            reward = agent.calculate_reward(self.market_data)
-            agent.update_policy(reward)
-            total_reward += reward
+        # Pass market data to reward calculation for strategic value assessment
+        rewards = [agent.calculate_reward(self.market_data) for agent in self.agents]
 
-        return total_reward
+        # Rewards don't depend on any network, so all due policy updates can
+        # share one batched backward pass
+        type(self.agents[0]).update_policies(
+            self.agents, rewards, self._stacked_networks
+        )
+
+        return sum(rewards)
 
     def _end_generation(self):
         """End current generation and start genetic algorithm selection."""
         logger.info(f"Ending generation {self.current_generation}")
 
         # Calculate fitness for all agents (using market data for strategic evaluation)
-        fitness_scores = [
-            (agent, agent.get_fitness(self.market_data)) for agent in self.agents
-        ]
-        fitness_scores.sort(
-            key=lambda x: x[1], reverse=True
-        )  # Sort by fitness (descending)
+        fitnesses = np.fromiter(
+            (agent.get_fitness(self.market_data) for agent in self.agents),
+            dtype=np.float64,
+            count=len(self.agents),
+        )
 
         # Record generation statistics
-        fitnesses = [score for _, score in fitness_scores]
         gen_stats = {
             "generation": self.current_generation,
-            "best_fitness": max(fitnesses),
-            "avg_fitness": np.mean(fitnesses),
-            "worst_fitness": min(fitnesses),
+            "best_fitness": float(fitnesses.max()),
+            "avg_fitness": fitnesses.mean(),
+            "worst_fitness": float(fitnesses.min()),
             "total_trades": len(self.trade_history),
         }
         self.generation_stats.append(gen_stats)
@@ -487,9 +518,10 @@ class TradingEnvironment:
             f"Trades={gen_stats['total_trades']}"
         )
 
-        # Select survivors (top 50%)
+        # Select survivors (top 50%); the stable sort keeps ties in population order
         num_survivors = int(self.population_size * self.survival_rate)
-        survivors = [agent for agent, _ in fitness_scores[:num_survivors]]
+        top = np.argsort(-fitnesses, kind="stable")[:num_survivors]
+        survivors = [self.agents[i] for i in top]
 
         # Create new generation
         new_agents = []
@@ -550,9 +582,8 @@ class TradingEnvironment:
             initial_inventory=None,  # Fresh random inventory
         )
 
-        # Copy parent's network weights
-        offspring.network.load_state_dict(parent.network.state_dict())
-        offspring.optimizer.load_state_dict(parent.optimizer.state_dict())
+        # Copy parent's network weights and optimizer state
+        offspring.inherit_from(parent)
 
         # Copy trading matrix
         offspring.trading_matrix = parent.trading_matrix.copy()
@@ -597,7 +628,7 @@ class TradingEnvironment:
                 {
                     "id": agent.agent_id,
                     "position": agent.position.tolist(),
-                    "inventory": agent.inventory,
+                    "inventory": dict(agent.inventory),
                     "desired_item": agent.desired_item,
                     "fitness": agent.get_fitness(self.market_data),
                     "successful_trades": agent.successful_trades,
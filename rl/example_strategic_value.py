@@ -35,7 +35,7 @@ def create_example_scenario():
         [0.5, 1.0, 1.5, 0.1],  # stone -> [wood, stone, iron, gold]
         [0.3, 0.8, 1.0, 0.1],  # iron -> [wood, stone, iron, gold]
         [10.0, 10.0, 10.0, 1.0]  # gold -> [wood, stone, iron, gold] (very high rates)
-    ])
+    ], dtype=np.float32)
     
     # Agent B: Wants stone, has iron
     # - Will trade iron for gold at rate 1:2 (good rate for gold)
@@ -45,7 +45,7 @@ def create_example_scenario():
         [2.0, 1.0, 1.5, 0.5],  # stone -> [wood, stone, iron, gold] (high rates for stone)
         [1.0, 0.3, 1.0, 2.0],  # iron -> [wood, stone, iron, gold] (good gold rate)
         [3.0, 2.0, 1.5, 1.0]   # gold -> [wood, stone, iron, gold]
-    ])
+    ], dtype=np.float32)
     
     # Agent C: Wants wood, has gold
     # - Will trade gold for wood at rate 1:3 (very good for wood)
@@ -55,7 +55,7 @@ def create_example_scenario():
         [1.5, 1.0, 0.8, 0.3],  # stone -> [wood, stone, iron, gold]
         [2.0, 1.2, 1.0, 0.4],  # iron -> [wood, stone, iron, gold]
         [3.0, 2.0, 1.5, 1.0]   # gold -> [wood, stone, iron, gold] (good rates for everything)
-    ])
+    ], dtype=np.float32)
     
     return [agent_a, agent_b, agent_c]
 
@@ -100,7 +100,7 @@ def demonstrate_strategic_value():
         
         # Show strategic value breakdown by item
         print("  Strategic value by item:")
-        desired_item_idx = agent.items_list.index(agent.desired_item)
+        desired_item_idx = agent.desired_item_idx
         
         for item_idx, item in enumerate(agent.items_list):
             if item == agent.desired_item or agent.inventory[item] <= 0:
@@ -132,8 +132,8 @@ def demonstrate_path_finding():
     
     market_data = {agent.agent_id: agent.trading_matrix for agent in agents}
     
-    wood_idx = agent_a.items_list.index('wood')
-    gold_idx = agent_a.items_list.index('gold')
+    wood_idx = agent_a.item_to_idx['wood']
+    gold_idx = agent_a.item_to_idx['gold']
     
     print(f"\nFinding best path from WOOD to GOLD for Agent A:")
     print(f"Available agents: {list(market_data.keys())}")
@@ -6,6 +6,7 @@ This script shows how the new format (b_i, b_j, D_i, D_j, D_j_amt) works
 and how invalid trade requests are filtered out.
 """
 
+import copy
 import numpy as np
 from agent import TradingAgent
 from environment import TradingEnvironment
@@ -39,7 +40,7 @@ def create_example_scenario():
         [1.0, 1.0, 0.5],  # wood -> [wood, stone, iron]
         [1.0, 1.0, 0.3],  # stone -> [wood, stone, iron]
         [2.0, 3.0, 1.0]   # iron -> [wood, stone, iron]
-    ])
+    ], dtype=np.float32)
     
     # Agent B: Wants wood, has stone and iron
     # Will trade 1 stone for 2 wood, 1 iron for 3 wood
@@ -47,7 +48,7 @@ def create_example_scenario():
         [1.0, 0.5, 0.3],  # wood -> [wood, stone, iron]
         [2.0, 1.0, 0.5],  # stone -> [wood, stone, iron]
         [3.0, 2.0, 1.0]   # iron -> [wood, stone, iron]
-    ])
+    ], dtype=np.float32)
     
     # Agent C: Wants stone, has wood and iron
     # Will trade 1 wood for 1 stone, 1 iron for 2 stone
@@ -55,7 +56,7 @@ def create_example_scenario():
         [1.0, 1.0, 0.5],  # wood -> [wood, stone, iron]
         [1.0, 1.0, 0.8],  # stone -> [wood, stone, iron]
         [0.5, 2.0, 1.0]   # iron -> [wood, stone, iron]
-    ])
+    ], dtype=np.float32)
     
     env.agents = [agent_a, agent_b, agent_c]
     
@@ -66,12 +67,13 @@ def create_example_scenario():
     return env
 
 
-def demonstrate_trade_requests():
+def demonstrate_trade_requests(env=None):
     """Demonstrate trade request generation and validation."""
     print("🔄 Trade Request Format Demonstration")
     print("=" * 60)
     
-    env = create_example_scenario()
+    if env is None:
+        env = create_example_scenario()
     
     print("\n📋 Initial Setup:")
     for agent in env.agents:
@@ -117,14 +119,14 @@ def demonstrate_trade_requests():
                 print(f"  ❌ INVALID: Insufficient resources or target unwilling")
                 
                 # Show why it's invalid
-                target_agent = next((a for a in env.agents if a.agent_id == target_id), None)
+                target_agent = env._agents_by_id.get(target_id)
                 if target_agent:
                     print(f"    Requester has {agent.inventory[item_giving]:.2f} {item_giving}")
                     print(f"    Target has {target_agent.inventory[item_wanting]:.2f} {item_wanting}")
                     
                     # Check target's willingness
-                    item_giving_idx = env.items_list.index(item_giving)
-                    item_wanting_idx = env.items_list.index(item_wanting)
+                    item_giving_idx = env.item_to_idx[item_giving]
+                    item_wanting_idx = env.item_to_idx[item_wanting]
                     target_rate = target_agent.trading_matrix[item_wanting_idx, item_giving_idx]
                     required_giving = amount_wanting / target_rate if target_rate > 0 else float('inf')
                     
@@ -144,12 +146,13 @@ def demonstrate_trade_requests():
     return trade_requests
 
 
-def demonstrate_trade_execution():
+def demonstrate_trade_execution(env=None):
     """Demonstrate trade execution with the new format."""
     print("\n\n⚡ Trade Execution Demonstration")
     print("=" * 60)
     
-    env = create_example_scenario()
+    if env is None:
+        env = create_example_scenario()
     
     # Set up a specific scenario
     # Agent A has 5 wood, wants iron
@@ -202,12 +205,13 @@ def demonstrate_trade_execution():
         print("❌ Trade failed!")
 
 
-def demonstrate_invalid_scenarios():
+def demonstrate_invalid_scenarios(env=None):
     """Demonstrate various invalid trade scenarios."""
     print("\n\n❌ Invalid Trade Scenarios")
     print("=" * 60)
     
-    env = create_example_scenario()
+    if env is None:
+        env = create_example_scenario()
     env._update_trading_matrices()
     env._collect_market_data()
     
@@ -232,7 +236,7 @@ def demonstrate_invalid_scenarios():
         print(f"\n{i}. Testing: {req_id} wants {want_amt} {want_item} from {tgt_id} for {give_item}")
         print(f"   Expected issue: {reason}")
         
-        requester = next(a for a in env.agents if a.agent_id == req_id)
+        requester = env._agents_by_id[req_id]
         is_valid = env._validate_trade_request(requester, tgt_id, give_item, want_item, want_amt)
         
         if is_valid:
@@ -242,9 +246,11 @@ def demonstrate_invalid_scenarios():
 
 
 if __name__ == "__main__":
-    demonstrate_trade_requests()
-    demonstrate_trade_execution()
-    demonstrate_invalid_scenarios()
+    # Build the scenario once; each demo mutates its own copy
+    base_env = create_example_scenario()
+    demonstrate_trade_requests(copy.deepcopy(base_env))
+    demonstrate_trade_execution(copy.deepcopy(base_env))
+    demonstrate_invalid_scenarios(copy.deepcopy(base_env))
     
     print("\n" + "=" * 60)
     print("🎉 Trade Request Format Demo Complete!")
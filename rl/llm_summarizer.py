@@ -5,23 +5,82 @@ Uses the Imagine SDK to provide real-time insights on trading patterns and agent
 
 import os
 import logging
+import queue
 import time
-from typing import List, Dict, Any, Optional
-from threading import Lock
-from collections import deque
+from typing import Callable, List, Dict, Any, Optional
+from threading import Lock, Thread
+from collections import Counter, namedtuple
+
+import numpy as np
 
 # LangChain integration with Imagine SDK
 try:
     from langchain_core.messages import HumanMessage, SystemMessage
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     print(
         "LangChain dependencies not installed. Run: pip install langchain langchain-core requests"
     )
     raise
 
+# orjson is optional; it encodes payloads straight to bytes and decodes faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# System prompt for trading analysis
+SYSTEM_PROMPT = """You are an expert financial analyst specializing in algorithmic trading and multi-agent systems. 
+        
+        You analyze trading data from a reinforcement learning environment where AI agents learn to trade items (diamond, gold, apple, emerald, redstone) to maximize their fitness.
+
+        Key concepts:
+        - Agents have inventories and desire specific items
+        - They use neural networks to learn optimal trading strategies
+        - Fitness is based on acquiring desired items
+        - Genetic algorithms evolve the population each generation
+        - Spatial positioning affects trade probability
+
+        Provide concise, insightful analysis focusing on:
+        1. Trading patterns and market dynamics
+        2. Agent performance and learning progress
+        3. Key trends and anomalies
+        4. Strategic insights for improvement
+
+        Keep responses under 250 words and use financial/trading terminology."""
+
+# Per-summary analysis request, filled in by generate_summary
+USER_PROMPT_TEMPLATE = """Analyze this BlockMarket trading data:
+
+ENVIRONMENT STATUS:
+- Generation: {generation}
+- Timestep: {timestep}
+- Active Agents: {num_agents}
+- Recent Trades: {num_trades}
+
+PERFORMANCE METRICS:
+- Best Fitness: {best_fitness:.2f}
+- Average Fitness: {avg_fitness:.2f}
+- Generation Progress: {progress_percent:.1f}%
+
+MARKET ACTIVITY:
+{market_analysis}
+
+AGENT INSIGHTS:
+{agent_analysis}
+
+TRADING PATTERNS:
+{trade_analysis}
+
+Provide a concise market analysis highlighting key trends, performance insights, and strategic observations."""
+
+# Reply returned by ImagineChat.invoke, mirroring LangChain's .content
+_Response = namedtuple("_Response", ["content"])
+
 
 class ImagineChat:
     """Custom implementation of Imagine SDK chat interface."""
@@ -39,6 +98,23 @@ class ImagineChat:
         if not self.api_key or not self.endpoint:
             raise ValueError("IMAGINE_API_KEY and IMAGINE_ENDPOINT_URL must be set")
 
+        # One pooled session keeps the TLS connection alive between summaries
+        self._session = requests.Session()
+        self._session.headers.update(
+            {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            }
+        )
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=4,
+                max_retries=Retry(total=2, backoff_factor=0.3),
+            ),
+        )
+
     def invoke(self, messages):
         """Send messages to Imagine API and get response."""
         try:
@@ -59,38 +135,32 @@ class ImagineChat:
                 "temperature": 0.7,
             }
 
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            }
-
-            # Make API request
-            response = requests.post(
-                f"{self.endpoint}/chat/completions",
-                json=payload,
-                headers=headers,
-                timeout=30,
-            )
+            # Make API request; the session already sends the JSON content type
+            url = f"{self.endpoint}/chat/completions"
+            if orjson is not None:
+                response = self._session.post(
+                    url, data=orjson.dumps(payload), timeout=30
+                )
+            else:
+                response = self._session.post(url, json=payload, timeout=30)
 
             if response.status_code == 200:
-                result = response.json()
+                result = (
+                    orjson.loads(response.content)
+                    if orjson is not None
+                    else response.json()
+                )
                 content = result["choices"][0]["message"]["content"]
-                return type("Response", (), {"content": content})()
+                return _Response(content=content)
             else:
                 logger.error(
                     f"Imagine API error: {response.status_code} - {response.text}"
                 )
-                return type(
-                    "Response", (), {"content": "Summary unavailable due to API error."}
-                )()
+                return _Response(content="Summary unavailable due to API error.")
 
         except Exception as e:
             logger.error(f"Error calling Imagine API: {e}")
-            return type(
-                "Response",
-                (),
-                {"content": "Summary unavailable due to connection error."},
-            )()
+            return _Response(content="Summary unavailable due to connection error.")
 
 
 class TradingSummarizer:
@@ -101,28 +171,17 @@ class TradingSummarizer:
     def __init__(self):
         """Initialize the summarizer with Imagine LLM."""
         self.model = ImagineChat(model="Llama-3.1-8B", max_tokens=300)
-        self.summaries = deque(maxlen=20)  # Keep last 20 summaries
+        # Last 20 summaries; replaced wholesale so readers need no lock
+        self._summaries: tuple = ()
         self.lock = Lock()
 
-        # System prompt for trading analysis
-        self.system_prompt = """You are an expert financial analyst specializing in algorithmic trading and multi-agent systems. 
-        
-        You analyze trading data from a reinforcement learning environment where AI agents learn to trade items (diamond, gold, apple, emerald, redstone) to maximize their fitness.
+        # Pending background requests; the worker starts on first submit
+        self._requests = queue.Queue(maxsize=2)
+        self._worker = None
 
-        Key concepts:
-        - Agents have inventories and desire specific items
-        - They use neural networks to learn optimal trading strategies
-        - Fitness is based on acquiring desired items
-        - Genetic algorithms evolve the population each generation
-        - Spatial positioning affects trade probability
-
-        Provide concise, insightful analysis focusing on:
-        1. Trading patterns and market dynamics
-        2. Agent performance and learning progress
-        3. Key trends and anomalies
-        4. Strategic insights for improvement
-
-        Keep responses under 250 words and use financial/trading terminology."""
+        # System prompt for trading analysis, sent unchanged with every request
+        self.system_prompt = SYSTEM_PROMPT
+        self._system_message = SystemMessage(content=SYSTEM_PROMPT)
 
     def generate_summary(
         self,
@@ -150,32 +209,19 @@ class TradingSummarizer:
             )
 
             # Create prompt
-            user_prompt = f"""Analyze this BlockMarket trading data:
-
-ENVIRONMENT STATUS:
-- Generation: {environment_data.get("generation", 0)}
-- Timestep: {environment_data.get("timestep", 0)}
-- Active Agents: {len(agent_data)}
-- Recent Trades: {len(trade_data)}
-
-PERFORMANCE METRICS:
-- Best Fitness: {environment_data.get("best_fitness", 0):.2f}
-- Average Fitness: {environment_data.get("avg_fitness", 0):.2f}
-- Generation Progress: {environment_data.get("generation_progress", 0) * 100:.1f}%
-
-MARKET ACTIVITY:
-{summary_data["market_analysis"]}
-
-AGENT INSIGHTS:
-{summary_data["agent_analysis"]}
-
-TRADING PATTERNS:
-{summary_data["trade_analysis"]}
-
-Provide a concise market analysis highlighting key trends, performance insights, and strategic observations."""
+            user_prompt = USER_PROMPT_TEMPLATE.format(
+                generation=environment_data.get("generation", 0),
+                timestep=environment_data.get("timestep", 0),
+                num_agents=len(agent_data),
+                num_trades=len(trade_data),
+                best_fitness=environment_data.get("best_fitness", 0),
+                avg_fitness=environment_data.get("avg_fitness", 0),
+                progress_percent=environment_data.get("generation_progress", 0) * 100,
+                **summary_data,
+            )
 
             messages = [
-                SystemMessage(content=self.system_prompt),
+                self._system_message,
                 HumanMessage(content=user_prompt),
             ]
 
@@ -202,7 +248,7 @@ Provide a concise market analysis highlighting key trends, performance insights,
             }
 
             with self.lock:
-                self.summaries.append(summary_entry)
+                self._summaries = (self._summaries + (summary_entry,))[-20:]
 
             logger.info(
                 "Generated LLM summary in %.2fs for generation %s",
@@ -215,6 +261,61 @@ Provide a concise market analysis highlighting key trends, performance insights,
             logger.error("Error generating summary: %s", e)
             return f"Summary generation failed: {str(e)}"
 
+    def accepting_requests(self) -> bool:
+        """Whether submit_summary_request would queue a request right now."""
+        return not self._requests.full()
+
+    def submit_summary_request(
+        self,
+        environment_data: Dict[str, Any],
+        agent_data: List[Dict],
+        trade_data: List[Dict],
+        generation_stats: Dict[str, Any],
+        callback: Optional[Callable[[str], None]] = None,
+    ) -> bool:
+        """
+        Queue a summary to be generated on the background worker thread.
+
+        Requests are dropped while two are already pending, so a slow API
+        never builds up a backlog of stale snapshots.
+
+        Args:
+            environment_data: Current environment statistics
+            agent_data: List of agent information
+            trade_data: Recent trade history
+            generation_stats: Generation performance metrics
+            callback: Optional function called with the finished summary
+
+        Returns:
+            True if the request was queued, False if it was dropped
+        """
+        with self.lock:
+            if self._worker is None:
+                self._worker = Thread(
+                    target=self._run_worker, name="llm-summarizer", daemon=True
+                )
+                self._worker.start()
+
+        try:
+            self._requests.put_nowait(
+                (environment_data, agent_data, trade_data, generation_stats, callback)
+            )
+        except queue.Full:
+            logger.debug("Summary request dropped; worker still busy")
+            return False
+        return True
+
+    def _run_worker(self):
+        """Generate queued summaries one at a time, forever."""
+        while True:
+            *summary_args, callback = self._requests.get()
+            summary = self.generate_summary(*summary_args)
+            if callback is not None:
+                try:
+                    callback(summary)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Summary callback failed")
+
     def _prepare_analysis_data(
         self,
         environment_data: Dict,
@@ -224,35 +325,32 @@ Provide a concise market analysis highlighting key trends, performance insights,
     ) -> Dict[str, str]:  # pylint: disable=unused-argument
         """Prepare structured data for LLM analysis."""
 
+        # Gather every per-agent figure in a single pass over agent_data
+        fitness_values = np.empty(len(agent_data))
+        desired_items = Counter()
+        successful_trades = 0
+        attempted_trades = 0
+        for i, agent in enumerate(agent_data):
+            fitness_values[i] = agent.get("fitness", 0)
+            successful_trades += agent.get("successful_trades", 0)
+            attempted_trades += agent.get("attempted_trades", 0)
+            desired_items[agent.get("desired_item", "unknown")] += 1
+
         # Market analysis
         if agent_data:
-            fitness_values = [agent.get("fitness", 0) for agent in agent_data]
-            top_agents = sorted(
-                agent_data, key=lambda x: x.get("fitness", 0), reverse=True
-            )[:3]
+            top = np.argsort(-fitness_values, kind="stable")[:3]
+            top_agents = [agent_data[i] for i in top]
 
             market_analysis = f"""
-- Fitness Range: {min(fitness_values):.2f} to {max(fitness_values):.2f}
+- Fitness Range: {fitness_values.min():.2f} to {fitness_values.max():.2f}
 - Top 3 Agents: {", ".join([f"{agent.get('id', 'Unknown')} ({agent.get('fitness', 0):.2f})" for agent in top_agents])}
-- Performance Spread: {max(fitness_values) - min(fitness_values):.2f}
+- Performance Spread: {fitness_values.max() - fitness_values.min():.2f}
 """
         else:
             market_analysis = "No agent data available"
 
         # Agent analysis
         if agent_data:
-            desired_items = {}
-            successful_trades = sum(
-                agent.get("successful_trades", 0) for agent in agent_data
-            )
-            attempted_trades = sum(
-                agent.get("attempted_trades", 0) for agent in agent_data
-            )
-
-            for agent in agent_data:
-                item = agent.get("desired_item", "unknown")
-                desired_items[item] = desired_items.get(item, 0) + 1
-
             success_rate = (
                 (successful_trades / attempted_trades * 100)
                 if attempted_trades > 0
@@ -270,17 +368,14 @@ Provide a concise market analysis highlighting key trends, performance insights,
         # Trade analysis
         if trade_data:
             recent_trades = trade_data[-10:]  # Last 10 trades
-            trade_pairs = {}
-
-            for trade in recent_trades:
-                requester_gave = trade.get("requester_gave", ["unknown", 0])
-                requester_received = trade.get("requester_received", ["unknown", 0])
-                pair = f"{requester_gave[0]}→{requester_received[0]}"
-                trade_pairs[pair] = trade_pairs.get(pair, 0) + 1
+            trade_pairs = Counter(
+                f"{trade.get('requester_gave', ['unknown', 0])[0]}"
+                f"→{trade.get('requester_received', ['unknown', 0])[0]}"
+                for trade in recent_trades
+            )
 
-            popular_trades = sorted(
-                trade_pairs.items(), key=lambda x: x[1], reverse=True
-            )[:3]
+            # Ties keep first-seen order, as the stable sort did
+            popular_trades = trade_pairs.most_common(3)
 
             trade_analysis = f"""
 - Recent Activity: {len(recent_trades)} trades in last period
@@ -298,18 +393,17 @@ Provide a concise market analysis highlighting key trends, performance insights,
 
     def get_recent_summaries(self, count: int = 5) -> List[Dict]:
         """Get the most recent summaries."""
-        with self.lock:
-            return list(self.summaries)[-count:]
+        return list(self._summaries[-count:])
 
     def get_latest_summary(self) -> Optional[Dict]:
         """Get the most recent summary."""
-        with self.lock:
-            return self.summaries[-1] if self.summaries else None
+        summaries = self._summaries
+        return summaries[-1] if summaries else None
 
     def clear_summaries(self):
         """Clear all stored summaries."""
         with self.lock:
-            self.summaries.clear()
+            self._summaries = ()
 
 
 # Global summarizer instance
@@ -11,7 +11,7 @@ import sys
 import os
 
 from config import load_config
-from utils import setup_logging, validate_config
+from utils import setup_logging, validate_config, configure_torch_threads
 
 
 def main():
@@ -40,6 +40,7 @@ def main():
     # Setup logging
     setup_logging(config)
     logger = logging.getLogger(__name__)
+    configure_torch_threads(config)
     
     # Run in selected mode
     if args.mode == 'training':
@@ -58,7 +59,7 @@ def run_training_mode(config, args, logger):
     import threading
     import time
     from training import create_training_environment, training_loop
-    from web_server import create_app
+    from web_server import create_app, serve_app
     
     logger.info("="*60)
     logger.info("🏪 Multi-Agent Trading Environment Starting (Training Mode)")
@@ -91,12 +92,7 @@ def run_training_mode(config, args, logger):
         app = create_app(current_state, env)
         
         def run_server():
-            app.run(
-                host=config['server']['host'],
-                port=config['server']['port'],
-                debug=config['server']['debug'],
-                use_reloader=False
-            )
+            serve_app(app, config['server'])
         
         server_thread = threading.Thread(target=run_server, daemon=True)
         server_thread.start()
@@ -1,12 +1,21 @@
+import copy
 import torch.nn as nn
 import torch.nn.functional as F
 import torch
 
+# torch.func (PyTorch 2.0+) is needed to batch independent networks
+try:
+    from torch.func import functional_call, stack_module_state, vmap
+except ImportError:
+    vmap = None
+
 
 class TradingNetwork(nn.Module):
     def __init__(self, config, num_items):
         super(TradingNetwork, self).__init__()
         self.num_items = num_items
+        # Bumped by whoever changes the weights; keys StackedNetworks' cache
+        self.weights_version = 0
         
         # Calculate input dimension
         # inventory (num_items) + desired_item_one_hot (num_items) + 
@@ -135,3 +144,97 @@ class ActorCriticNetwork(nn.Module):
         state_value = self.critic(shared_features)
         
         return trading_matrix_flat, state_value
+
+
+class StackedNetworks:
+    """
+    Evaluates a population of same-architecture networks in one batched forward.
+
+    Each network keeps its own weights; they are stacked along a leading
+    population dimension and run through torch.func.vmap. The stacked copy is
+    rebuilt only when a network's weights_version changes, so code that
+    updates weights (optimizer steps, mutation, state_dict loads) must
+    increment it.
+    """
+
+    def __init__(self):
+        self._networks = None
+        self._weights_key = None
+        self._params = None
+        self._buffers = None
+        self._forward = None
+
+    @staticmethod
+    def supports(networks):
+        """Whether these networks can be batched together."""
+        return (
+            vmap is not None
+            and len(networks) > 0
+            and len({type(network) for network in networks}) == 1
+            and len({network.num_items for network in networks}) == 1
+            and all(hasattr(network, "weights_version") for network in networks)
+        )
+
+    def _restack(self, networks, weights_key):
+        with torch.no_grad():
+            self._params, self._buffers = stack_module_state(networks)
+        base = copy.deepcopy(networks[0]).to("meta")
+
+        def forward(params, buffers, x):
+            return functional_call(base, (params, buffers), (x,))
+
+        self._forward = vmap(forward)
+        # Holding the networks keeps their ids unique in the cache key
+        self._networks = list(networks)
+        self._weights_key = weights_key
+
+    def __call__(self, networks, states):
+        """
+        Forward states[i] through networks[i] for every i.
+
+        Args:
+            networks: List of networks accepted by supports()
+            states: Tensor of shape (len(networks), input_dim)
+
+        Returns:
+            Tensor of stacked network outputs
+        """
+        weights_key = tuple(
+            (id(network), network.weights_version) for network in networks
+        )
+        if weights_key != self._weights_key:
+            self._restack(networks, weights_key)
+
+        with torch.inference_mode():
+            return self._forward(self._params, self._buffers, states)
+
+    @staticmethod
+    def mse_gradients(networks, states, targets):
+        """
+        Set every network's gradients for one MSE regression step, batched.
+
+        Equivalent to backpropagating mse_loss(networks[i](states[i]), targets[i])
+        separately for each i, but with a single vmapped forward and backward.
+
+        Args:
+            networks: List of networks accepted by supports()
+            states: Tensor of shape (len(networks), input_dim)
+            targets: Tensor of shape (len(networks), output_dim)
+        """
+        params, buffers = stack_module_state(networks)
+        base = copy.deepcopy(networks[0]).to("meta")
+
+        def loss(params, buffers, state, target):
+            predicted = functional_call(base, (params, buffers), (state,))
+            return F.mse_loss(predicted, target)
+
+        # Losses are independent, so the gradient of their sum w.r.t. row i
+        # of a stacked parameter is network i's own gradient
+        losses = vmap(loss)(params, buffers, states, targets)
+        names = list(params)
+        grads = torch.autograd.grad(losses.sum(), [params[name] for name in names])
+
+        for i, network in enumerate(networks):
+            network_params = dict(network.named_parameters())
+            for name, grad in zip(names, grads):
+                network_params[name].grad = grad[i]
@@ -20,8 +20,6 @@ import logging
 import torch
 import torch.onnx
 import numpy as np
-import onnx
-import onnxruntime as ort
 from typing import List, Dict, Tuple, Optional, Union
 from pathlib import Path
 import json
@@ -219,6 +217,10 @@ class ONNXConverter:
         Returns:
             True if validation passes, False otherwise
         """
+        # onnx and onnxruntime are slow to import, so only load them when needed
+        import onnx
+        import onnxruntime as ort
+
         try:
             logger.info(f"Validating ONNX model: {onnx_path}")
             
@@ -275,6 +277,8 @@ class ONNXConverter:
         Returns:
             Metadata dictionary
         """
+        import onnx
+
         metadata = {
             "model_info": {
                 "onnx_path": os.path.basename(onnx_path),
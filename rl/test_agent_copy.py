@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Test that copied agents build their network input from their own state.
+"""
+
+import copy
+import numpy as np
+from agent import TradingAgent
+from config import load_config
+
+
+def test_deepcopy_state_vector():
+    """A deep-copied agent's state vector should reflect its inventory."""
+    config = load_config()
+    items_list = ['wood', 'stone', 'iron']
+    agent = TradingAgent('agent_a', config, items_list, 'iron',
+                         initial_inventory={'wood': 5, 'stone': 0, 'iron': 0})
+
+    copied = copy.deepcopy(agent)
+    copied.inventory['stone'] = 10
+
+    state = copied.get_state_vector().numpy()
+    np.testing.assert_allclose(state[:3], [0.5, 1.0, 0.0])
+
+    # The original keeps its own buffer
+    original_state = agent.get_state_vector().numpy()
+    np.testing.assert_allclose(original_state[:3], [1.0, 0.0, 0.0])
+    print("✅ Copied agent state vector matches its inventory")
+
+
+if __name__ == "__main__":
+    test_deepcopy_state_vector()
@@ -95,29 +95,28 @@ def training_loop(
                 generation_rewards.append(step_info["total_reward"])
                 generation_trades.append(step_info["trades_executed"])
 
-                # Update current state for web interface
+                # Update current state for web interface; fitness is computed
+                # once per step and shared with the summary snapshot below
                 env_state = env.get_state()
+                fitnesses = [agent.get_fitness(env.market_data) for agent in env.agents]
                 current_state.update(
                     {
                         "timestep": env.current_timestep,
                         "generation": env.current_generation,
                         "total_agents": len(env.agents),
                         "recent_trades": len(env.trade_history),
-                        "avg_fitness": np.mean(
-                            [agent.get_fitness(env.market_data) for agent in env.agents]
-                        ),
-                        "best_fitness": max(
-                            [agent.get_fitness(env.market_data) for agent in env.agents]
-                        ),
+                        "avg_fitness": np.mean(fitnesses),
+                        "best_fitness": max(fitnesses),
                         "generation_progress": (timestep_in_gen + 1)
                         / env.generation_length,
                     }
                 )
 
-                # Generate LLM summary every half generation
+                # Generate LLM summary every half generation, skipping the
+                # snapshot entirely while the summarizer is still busy
                 if (
                     env.current_timestep - last_summary_timestep
-                ) >= half_generation_interval:
+                ) >= half_generation_interval and summarizer.accepting_requests():
                     try:
                         logger.info(
                             f"Generating LLM summary at timestep {env.current_timestep}"
@@ -126,14 +125,14 @@ def training_loop(
                         # Prepare data for LLM analysis
                         environment_data = current_state.copy()
                         agent_data = []
-                        for agent in env.agents:
+                        for agent, fitness in zip(env.agents, fitnesses):
                             agent_data.append(
                                 {
                                     "id": agent.agent_id,
                                     "position": agent.position.tolist(),
-                                    "inventory": agent.inventory,
+                                    "inventory": dict(agent.inventory),
                                     "desired_item": agent.desired_item,
-                                    "fitness": agent.get_fitness(env.market_data),
+                                    "fitness": fitness,
                                     "successful_trades": agent.successful_trades,
                                     "attempted_trades": agent.attempted_trades,
                                 }
@@ -147,22 +146,19 @@ def training_loop(
                             / env.generation_length,
                         }
 
-                        # Generate summary asynchronously to avoid blocking training
-                        import threading
-
-                        def generate_summary_async():
-                            summary = summarizer.generate_summary(
-                                environment_data,
-                                agent_data,
-                                trade_data,
-                                generation_stats,
-                            )
+                        # Generate summary on the summarizer's worker thread
+                        # to avoid blocking training
+                        def store_summary(summary):
                             current_state["latest_summary"] = summary
                             current_state["summary_timestamp"] = time.time()
 
-                        summary_thread = threading.Thread(target=generate_summary_async)
-                        summary_thread.daemon = True
-                        summary_thread.start()
+                        summarizer.submit_summary_request(
+                            environment_data,
+                            agent_data,
+                            trade_data,
+                            generation_stats,
+                            callback=store_summary,
+                        )
 
                         last_summary_timestep = env.current_timestep
 
@@ -14,9 +14,9 @@ from typing import Dict, Any, Optional
 from flask import Flask
 
 from config import load_config
-from utils import setup_logging, validate_config
+from utils import setup_logging, validate_config, configure_torch_threads
 from training import create_training_environment
-from web_server import create_app
+from web_server import create_app, serve_app
 from environment import TradingEnvironment
 from agent import TradingAgent
 
@@ -59,6 +59,8 @@ class UnifiedTradingApp:
         self.flask_thread: Optional[threading.Thread] = None
         self.external_simulation_running = False
         self.external_simulation_thread: Optional[threading.Thread] = None
+        # Set once the external simulation completes a generation or stops
+        self.external_generation_done = threading.Event()
 
         # Initialize components
         self._setup_environment()
@@ -213,6 +215,7 @@ class UnifiedTradingApp:
             external_env.agent_positions[agent.agent_id] = agent.position
 
         # Start external simulation in separate thread
+        self.external_generation_done.clear()
         self.external_simulation_running = True
         self.current_state["external_simulation_running"] = True
         self.external_simulation_thread = threading.Thread(
@@ -269,6 +272,8 @@ class UnifiedTradingApp:
                 self._emit_trade_data(external_env, step_info, timestep)
 
                 timestep += 1
+                if timestep == external_env.generation_length:
+                    self.external_generation_done.set()
 
                 # Small delay to prevent overwhelming the socket
                 time.sleep(0.1)
@@ -283,6 +288,7 @@ class UnifiedTradingApp:
         finally:
             self.external_simulation_running = False
             self.current_state["external_simulation_running"] = False
+            self.external_generation_done.set()
             logger.info("External simulation stopped")
 
     def _emit_trade_data(
@@ -495,12 +501,7 @@ class UnifiedTradingApp:
 
         def run_server():
             try:
-                self.flask_app.run(
-                    host=self.config["server"]["host"],
-                    port=self.config["server"]["port"],
-                    debug=self.config["server"]["debug"],
-                    use_reloader=False,  # Disable reloader to avoid issues with threading
-                )
+                serve_app(self.flask_app, self.config["server"])
             except Exception as e:
                 logger.error(f"Flask server error: {e}")
 
@@ -664,6 +665,12 @@ class UnifiedTradingApp:
 
         logger.info("🏁 Unified application shutdown complete")
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
 
 def main():
     """Main function to run the unified trading application."""
@@ -698,6 +705,7 @@ def main():
 
     # Setup logging
     setup_logging(config)
+    configure_torch_threads(config)
 
     # Create and run unified app
     app = UnifiedTradingApp(config)
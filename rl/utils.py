@@ -1,5 +1,7 @@
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 import numpy as np
 from typing import Dict, List, Any
@@ -86,6 +88,57 @@ def setup_logging(config, append_mode=False):
     return log_file, mode_description
 
 
+def start_queue_logging(handlers, level=logging.DEBUG):
+    """
+    Route root logging through a queue serviced by a background thread.
+
+    Logging calls only merge the message (and any traceback) and enqueue the
+    record; the given handlers' formatting and I/O happen on a QueueListener
+    thread, so chatty DEBUG logging does not block event callbacks or the
+    simulation loop.
+
+    Args:
+        handlers: Handlers that should receive the records
+        level: Root logger level
+
+    Returns:
+        The started QueueListener; call stop() on exit to flush pending records
+    """
+    log_queue = queue.Queue(-1)
+    # Attached directly rather than through basicConfig, which would give the
+    # QueueHandler a prefixing formatter and double every line's prefix
+    root_logger = logging.getLogger()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(level)
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    listener.start()
+    return listener
+
+
+def configure_torch_threads(config):
+    """
+    Limit PyTorch's CPU thread pools for this process.
+
+    The per-agent networks are tiny, so multi-threaded kernels mostly add
+    synchronization overhead and oversubscribe cores when several simulations
+    run side by side. Set training.torch_threads to 0 to keep PyTorch's default.
+    """
+    num_threads = config.get('training', {}).get('torch_threads', 1)
+    if not num_threads:
+        return
+
+    import torch
+
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(num_threads)
+    except RuntimeError:
+        # Inter-op pool size can only be set before any parallel work starts
+        pass
+
+
 def calculate_trade_statistics(trade_history: List[Dict]) -> Dict[str, Any]:
     """
     Calculate statistics from trade history.
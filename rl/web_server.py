@@ -3,6 +3,12 @@ import numpy as np
 import logging as flask_logging
 import json
 
+# waitress is optional; without it the dashboard uses Flask's built-in server
+try:
+    from waitress import serve as waitress_serve
+except ImportError:
+    waitress_serve = None
+
 
 def create_app(current_state, env):
     """Create and configure Flask application for trading visualization."""
@@ -50,7 +56,7 @@ def create_app(current_state, env):
                 agent_data = {
                     "id": agent.agent_id,
                     "position": agent.position.tolist(),
-                    "inventory": agent.inventory,
+                    "inventory": dict(agent.inventory),
                     "desired_item": agent.desired_item,
                     "fitness": agent.get_fitness(),  # Note: market_data not available in web context
                     "successful_trades": agent.successful_trades,
@@ -142,6 +148,38 @@ def create_app(current_state, env):
     return app
 
 
+def serve_app(app, server_config):
+    """
+    Serve the dashboard until the process exits.
+
+    Uses waitress's multi-threaded WSGI server when it is installed and the
+    server is not in debug mode, falling back to Flask's development server.
+
+    Args:
+        app: Flask application from create_app
+        server_config: The config's "server" section (host, port, debug,
+            optional production and threads)
+    """
+    if (
+        waitress_serve is not None
+        and server_config.get("production", True)
+        and not server_config["debug"]
+    ):
+        waitress_serve(
+            app,
+            host=server_config["host"],
+            port=server_config["port"],
+            threads=server_config.get("threads", 4),
+        )
+    else:
+        app.run(
+            host=server_config["host"],
+            port=server_config["port"],
+            debug=server_config["debug"],
+            use_reloader=False,  # Disable reloader to avoid issues with threading
+        )
+
+
 # HTML Template for the visualization page
 HTML_TEMPLATE = """
 <!DOCTYPE html>